@@ -1,68 +1,96 @@
-import os
 import time
+import argparse
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from src.embedder import get_embedding
+from src.embedder import get_embedder, EMBEDDING_SLOTS
+from src.stores import create_store
+from src.profiling import stage
 
 load_dotenv()
 
-# 初始化 Supabase
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
+# 初始化存储 (STORAGE_BACKEND 未设置时：有 Supabase 凭证直连，否则用本地库)
+store = create_store()
 
-if not url or not key:
-    print("❌ Error: Supabase credentials not found.")
-    exit()
+def embed_text(item: dict) -> str:
+    # 组合文本：标题 + 摘要 + 标签 + 来源
+    # 组合的信息越全，搜索越准
+    return f"{item['title']} {item.get('summary', '')} {item.get('tags', '')} {item.get('source', '')}"
 
-supabase: Client = create_client(url, key)
-
-def run_backfill():
-    print("🔍 Checking for items without embeddings...")
-    
-    # 1. 查找 embedding 为空的记录
-    # is_("embedding", "null") 是 Supabase 过滤空值的写法
-    try:
-        response = supabase.table("sota_items") \
-            .select("*") \
-            .is_("embedding", "null") \
-            .execute()
-        
-        items = response.data
-    except Exception as e:
-        print(f"❌ Failed to fetch items: {e}")
+def run_backfill(slot="embedding", batch_size=32, pause=0.0, loop=False):
+    """
+    给 slot 槽位补齐/迁移向量：空的，或者不是当前配置模型生成的行都会重算。
+    分批处理，每批之间 sleep pause 秒，可以在线上慢慢跑，搜索不受影响 (搜索读的是另一个槽位)。
+    """
+    model_spec = EMBEDDING_SLOTS.get(slot)
+    if not model_spec:
+        print(f"❌ Error: No model configured for slot '{slot}' (set EMBEDDING_MODEL / EMBEDDING_MODEL_NEXT).")
         return
 
-    if not items:
-        print("✅ All items already have embeddings. No backfill needed.")
-        return
+    print(f"🔍 Checking for items whose '{slot}' is missing or not from {model_spec}...")
+    embedder = get_embedder(model_spec)
+    done, failed = 0, set()
 
-    print(f"📦 Found {len(items)} items to process. Starting backfill...")
-    print("-" * 40)
+    while True:
+        # 1. 取一批需要处理的记录
+        try:
+            with stage("fetch_rows"):
+                items = [i for i in store.rows_needing_embedding(slot, model_spec, batch_size + len(failed)) if i['id'] not in failed]
+            items = items[:batch_size]
+        except Exception as e:
+            print(f"❌ Failed to fetch items: {e}")
+            if not loop:
+                return
+            time.sleep(max(pause, 60))
+            continue
+
+        if not items:
+            if not loop:
+                break
+            time.sleep(max(pause, 60))
+            continue
 
-    # 2. 逐条生成向量并更新
-    for i, item in enumerate(items):
+        # 2. 整批生成向量 (本地 CPU 运算)，再逐条写回
         try:
-            # 组合文本：标题 + 摘要 + 标签 + 来源
-            # 组合的信息越全，搜索越准
-            text_to_embed = f"{item['title']} {item.get('summary', '')} {item.get('tags', '')} {item.get('source', '')}"
-            
-            # 生成向量 (本地 CPU 运算)
-            vector = get_embedding(text_to_embed)
-            
-            # 更新回数据库
-            supabase.table("sota_items") \
-                .update({"embedding": vector}) \
-                .eq("id", item['id']) \
-                .execute()
-                
-            print(f"   ({i+1}/{len(items)}) ✅ Vectorized: {item['title']}")
-            
+            with stage("embed", memory=True):
+                vectors = embedder.generate_embeddings([embed_text(item) for item in items])
         except Exception as e:
-            print(f"   ({i+1}/{len(items)}) ❌ Failed: {item['title']} - {e}")
+            # 整批失败 (OOM、某条文本有问题)：退避后逐条重试，还是失败的和写入失败一样记下跳过
+            print(f"   ⚠️ Batch embedding failed, retrying one by one: {e}")
+            time.sleep(max(pause, 5))
+            vectors = []
+            for item in items:
+                try:
+                    vectors.append(embedder.generate_embeddings([embed_text(item)])[0])
+                except Exception as e:
+                    failed.add(item['id'])
+                    vectors.append(None)
+                    print(f"   ❌ Failed to embed: {item['title']} - {e}")
+        with stage("write"):
+            for item, vector in zip(items, vectors):
+                if vector is None:
+                    continue
+                try:
+                    store.update_embedding(item['id'], vector, slot, model_spec)
+                    done += 1
+                    print(f"   ({done}) ✅ Vectorized: {item['title']}")
+                except Exception as e:
+                    failed.add(item['id'])
+                    print(f"   ❌ Failed: {item['title']} - {e}")
 
+        # 3. 节流，别把数据库和 CPU 打满
+        if pause:
+            time.sleep(pause)
+
+    if not done and not failed:
+        print("✅ All items already have up-to-date embeddings. No backfill needed.")
+        return
     print("-" * 40)
-    print("🎉 Backfill completed!")
+    print(f"🎉 Backfill completed! {done} rows now on {model_spec} ({len(failed)} failed)")
 
 if __name__ == "__main__":
-    run_backfill()
-    
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Backfill or migrate embeddings for sota_items")
+    parser.add_argument("--slot", default="embedding", choices=list(EMBEDDING_SLOTS), help="which embedding column to fill")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches (throttle)")
+    parser.add_argument("--loop", action="store_true", help="keep running and pick up new rows")
+    args = parser.parse_args()
+    run_backfill(args.slot, args.batch_size, args.pause, args.loop)
@@ -0,0 +1,301 @@
+"""
+dashboard 并发压测：N 个模拟会话同时跑 get_data (卡片流 / 混合 / 关键词 / 语义搜索)。
+
+Streamlit 每个会话的脚本跑在自己的线程里，共享 st.cache_resource 里的同一个 store、BM25 索引和
+embedding 模型单例，这里用同样的方式：一个 DashboardData 实例，N 个线程。
+数据库用临时目录里的 SQLite 替身 (合成数据)，不会碰 Supabase，也不会覆盖本地搜索索引。
+
+输出：每个并发档位的吞吐、各类请求的 p50/p95/p99、模型争用 (查询向量耗时相对单会话基线的放大倍数、
+同时在跑的 encode 数)、RSS 增长。结果可以存成 JSON，下次用 --compare 对比回归。
+
+用法:
+    python benchmarks/dashboard_load.py                                  # 1 / 4 / 12 个会话，各 20 秒
+    python benchmarks/dashboard_load.py --sessions 1 8 16 32 --duration 30 --items 20000
+    python benchmarks/dashboard_load.py --output bench_dashboard.json
+    python benchmarks/dashboard_load.py --compare bench_dashboard.json   # 和上次的结果对比
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+# 概念型查询走向量 + RRF，标识符型查询命中 BM25 后直接返回
+CONCEPT_QUERIES = ["video generation", "autonomous agents", "长上下文推理", "speech synthesis",
+                   "mixture of experts", "multimodal retrieval", "代码生成模型", "robot manipulation"]
+ID_QUERIES = ["Qwen2.5-VL", "DeepSeek-V3", "llama.cpp", "vllm", "model-42", "flash_attention"]
+TAGS = ["LLM", "Vision", "Agent", "Framework", "Hardware", "Audio"]
+SOURCES = ["github", "huggingface", "hackernews"]
+WORDS = ["moe", "transformer", "diffusion", "agent", "retrieval", "vision", "speech", "quantization",
+         "long-context", "reasoning", "benchmark", "inference", "多模态", "推理", "长上下文", "工具调用"]
+DEFAULT_MIX = "feed=0.5,hybrid=0.3,keyword=0.1,semantic=0.1"
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed_store(path: str, n_items: int, dim: int, days: int = 90):
+    from src.stores import SQLiteStore
+    rng = random.Random(42)
+    vectors = np.random.default_rng(42).standard_normal((n_items, dim)).astype(np.float32)
+    now = time.time()
+    store = SQLiteStore(path)
+    rows = []
+    for i in range(n_items):
+        words = " ".join(rng.sample(WORDS, 4))
+        created = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(now - rng.random() * days * 86400))
+        rows.append({
+            "id": i + 1,
+            "title": f"org-{i % 500}/model-{i} {words}",
+            "url": f"https://github.com/org-{i % 500}/model-{i}",
+            "summary": f"基于 {words} 的开源项目，支持工具调用与长上下文推理。",
+            "score": rng.randint(5, 10),
+            "tags": rng.choice(TAGS),
+            "source": rng.choice(SOURCES),
+            "created_at": created,
+            "embedding": vectors[i].tolist(),
+        })
+        if len(rows) == 1000:
+            store.upsert(rows)
+            rows = []
+    if rows:
+        store.upsert(rows)
+    return store
+
+
+class EmbedProbe:
+    """
+    包一层查询向量的 encode：记录每次耗时，以及同一时刻有几个会话在抢模型
+    """
+
+    def __init__(self, embedder):
+        self._encode = embedder.generate_embedding
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latencies = []
+        embedder.generate_embedding = self
+
+    def __call__(self, text):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            return self._encode(text)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.latencies.append(elapsed)
+
+    def reset(self):
+        with self._lock:
+            self.max_in_flight = self.in_flight
+            self.latencies = []
+
+
+def _request(rng, mix: list):
+    op = rng.choices([name for name, _ in mix], weights=[w for _, w in mix])[0]
+    min_score = rng.choice([7, 7, 8, 9])
+    tags = [rng.choice(TAGS)] if rng.random() < 0.2 else None
+    if op == "feed":
+        return op, dict(query_text=None, min_score=min_score, tags=tags)
+    query = rng.choice(ID_QUERIES if op == "keyword" else CONCEPT_QUERIES)
+    mode = {"hybrid": "Hybrid", "keyword": "Keyword", "semantic": "Semantic"}[op]
+    return op, dict(query_text=query, min_score=min_score, mode=mode, tags=tags)
+
+
+def _session(data, mix, think_ms, seed, stop, results, errors):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        op, kwargs = _request(rng, mix)
+        start = time.perf_counter()
+        try:
+            data.get_data(**kwargs)
+            results[op].append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            errors.append(f"{op}: {e}")
+        if think_ms:
+            stop.wait(rng.expovariate(1 / think_ms) / 1000)
+
+
+def run_level(data, probe, sessions: int, duration: float, mix: list, think_ms: float, baseline_embed_ms: float) -> dict:
+    results = defaultdict(list)
+    errors = []
+    stop = threading.Event()
+    probe.reset()
+
+    rss = [_rss_mb()]
+    sampler_stop = threading.Event()
+
+    def sample():
+        while not sampler_stop.wait(0.5):
+            rss.append(_rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+
+    threads = [
+        threading.Thread(target=_session, args=(data, mix, think_ms, i, stop, results, errors), daemon=True)
+        for i in range(sessions)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    sampler_stop.set()
+    sampler.join()
+    rss.append(_rss_mb())
+
+    total = sum(len(v) for v in results.values())
+    all_latencies = [x for v in results.values() for x in v]
+    embed = probe.latencies
+    return {
+        "sessions": sessions,
+        "requests": total,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "throughput_rps": total / elapsed,
+        "p50_ms": _percentile(all_latencies, 50),
+        "p95_ms": _percentile(all_latencies, 95),
+        "p99_ms": _percentile(all_latencies, 99),
+        "ops": {
+            op: {"count": len(v), "p50_ms": _percentile(v, 50), "p95_ms": _percentile(v, 95), "p99_ms": _percentile(v, 99)}
+            for op, v in sorted(results.items())
+        },
+        "embed": {
+            "calls": len(embed),
+            "p50_ms": _percentile(embed, 50),
+            "p95_ms": _percentile(embed, 95),
+            # 单会话基线的倍数：>1 说明查询向量在排队/抢 CPU
+            "contention_factor": _percentile(embed, 50) / baseline_embed_ms if baseline_embed_ms and embed else None,
+            "max_in_flight": probe.max_in_flight,
+        },
+        "rss_start_mb": rss[0],
+        "rss_peak_mb": max(rss),
+        "rss_end_mb": rss[-1],
+    }
+
+
+def _print_level(r: dict):
+    embed = r["embed"]
+    factor = f"{embed['contention_factor']:.1f}x" if embed["contention_factor"] else "-"
+    print(f"{r['sessions']:>4} | {r['throughput_rps']:>7.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} | "
+          f"{embed['p50_ms']:>7.1f} {factor:>6} {embed['max_in_flight']:>4} | "
+          f"{r['rss_start_mb']:>6.0f} -> {r['rss_end_mb']:>6.0f} (peak {r['rss_peak_mb']:.0f}) | {r['errors']} err")
+    for op, s in r["ops"].items():
+        print(f"       {op:<9} n={s['count']:<6} p50 {s['p50_ms']:>7.1f}  p95 {s['p95_ms']:>7.1f}  p99 {s['p99_ms']:>7.1f} ms")
+
+
+def compare(results: list, baseline_path: str, threshold: float):
+    """
+    和之前保存的结果按并发档位对比：吞吐下降或 p95 上升超过 threshold 就标出来
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["sessions"]: r for r in json.load(f)["levels"]}
+    print(f"\n📊 Compared with {baseline_path} (flagging changes worse than {threshold:.0%}):")
+    regressions = 0
+    for r in results:
+        old = baseline.get(r["sessions"])
+        if not old:
+            continue
+        rps = r["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0
+        p95 = r["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0
+        bad = rps < -threshold or p95 > threshold
+        regressions += bad
+        print(f"{'❌' if bad else '✅'} {r['sessions']:>4} sessions: throughput {rps:+.0%}, p95 {p95:+.0%}, "
+              f"RSS end {r['rss_end_mb'] - old['rss_end_mb']:+.0f} MB")
+    return regressions
+
+
+def main(args) -> int:
+    from src.embedder import get_embedder, EMBEDDING_SLOTS, SEARCH_SLOT
+    from src.search_index import BM25Index, sync_index
+    from src.dashboard_data import DashboardData
+
+    mix = [(name, float(weight)) for name, weight in (part.split("=") for part in args.mix.split(","))]
+    embedder = get_embedder(EMBEDDING_SLOTS[SEARCH_SLOT])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🌱 Seeding {args.items} synthetic items (dim={embedder.dim}) into a local SQLite stand-in...")
+        store = seed_store(os.path.join(tmp, "load.db"), args.items, embedder.dim)
+        index = BM25Index()
+        sync_index(index, store)
+        index.last_sync = time.time()
+        # index_path=None：不覆盖本地真实的搜索索引
+        data = DashboardData(store, index=index, index_path=None)
+
+        # 预热：模型、向量矩阵缓存；再测单会话的查询向量基线
+        data.get_data(CONCEPT_QUERIES[0], 7, "Semantic")
+        probe = EmbedProbe(embedder)
+        for q in CONCEPT_QUERIES * 3:
+            data.vector_search(q)
+        baseline_embed_ms = _percentile(probe.latencies, 50)
+        print(f"🧠 Solo query embedding p50: {baseline_embed_ms:.1f} ms\n")
+
+        header = (f"{'sess':>4} | {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} | "
+                  f"{'emb p50':>7} {'contn':>6} {'inFl':>4} | {'RSS MB':>22} | errors")
+        print(header)
+        print("-" * len(header))
+        levels = []
+        for sessions in args.sessions:
+            result = run_level(data, probe, sessions, args.duration, mix, args.think_ms, baseline_embed_ms)
+            levels.append(result)
+            _print_level(result)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None,
+        "config": {"items": args.items, "duration": args.duration, "mix": args.mix, "think_ms": args.think_ms,
+                   "cpus": os.cpu_count(), "embed_threads": os.getenv("EMBED_THREADS"), "model": EMBEDDING_SLOTS[SEARCH_SLOT]},
+        "baseline_embed_ms": baseline_embed_ms,
+        "levels": levels,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results saved to {args.output}")
+    if args.compare:
+        return 1 if compare(levels, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent load test for the dashboard data paths")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 12], help="concurrency levels to run")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per concurrency level")
+    parser.add_argument("--items", type=int, default=5000, help="synthetic rows in the stand-in database")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="request mix, e.g. feed=0.5,hybrid=0.3,keyword=0.1,semantic=0.1")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean think time between requests per session (0 = closed loop)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON from a previous --output run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,170 @@
+"""
+LocalEmbedder 吞吐基准：batch size × 序列长度 × 线程数 × 精度。
+
+每组配置在独立子进程里跑 (线程数设置和峰值 RSS 互不干扰)，输出：
+texts/sec、单批延迟 p50/p95/p99、峰值 RSS，最后给出推荐的 EMBED_* 环境变量。
+
+用法:
+    python benchmarks/embed_bench.py                # 默认网格
+    python benchmarks/embed_bench.py --quick        # 小网格，几分钟内跑完
+    python benchmarks/embed_bench.py --threads 1 2 4 --precision fp32 int8 --output bench_embed.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import itertools
+import multiprocessing as mp
+from queue import Empty
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 和线上 save_items 的输入差不多：标题 + 中文摘要 + 标签
+SAMPLE_TEXT = (
+    "deepseek-ai/DeepSeek-V3 基于 MoE 架构的开源大模型，671B 总参数、37B 激活参数，"
+    "采用 MLA 注意力与无辅助损失的负载均衡策略，在代码与数学基准上接近闭源模型。 LLM "
+)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _make_texts(n: int, seq_length: int) -> list:
+    # 粗略按字符重复到目标长度，真正的截断由 max_seq_length 控制
+    text = (SAMPLE_TEXT * (seq_length // 32 + 1))
+    return [f"{i} {text}" for i in range(n)]
+
+
+def _run_config(config: dict, n_texts: int, queue):
+    try:
+        from src.embedder import LocalEmbedder
+
+        embedder = LocalEmbedder(
+            config["model"],
+            threads=config["threads"],
+            batch_size=config["batch_size"],
+            max_seq_length=config["seq_length"],
+            precision=config["precision"],
+        )
+        texts = _make_texts(n_texts, config["seq_length"])
+        # 预热一批，排除首次调用的图初始化开销
+        embedder.generate_embeddings(texts[:config["batch_size"]])
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(0, n_texts, config["batch_size"]):
+            t0 = time.perf_counter()
+            embedder.generate_embeddings(texts[i:i + config["batch_size"]])
+            latencies.append((time.perf_counter() - t0) * 1000)
+        elapsed = time.perf_counter() - start
+
+        queue.put({
+            **config,
+            "texts_per_sec": n_texts / elapsed,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            # Linux 上 ru_maxrss 单位是 KB
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    except Exception as e:
+        queue.put({**config, "error": str(e)})
+
+
+def _wait_result(proc, queue, config: dict, timeout: float) -> dict:
+    """
+    等子进程的结果。子进程被 OOM kill / 段错误 / 模型下载卡死时不会往队列里放东西，不能无限等。
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return queue.get(timeout=1)
+        except Empty:
+            pass
+        if not proc.is_alive():
+            # 进程刚退出时结果可能还在管道里
+            try:
+                return queue.get(timeout=1)
+            except Empty:
+                return {**config, "error": f"worker exited with code {proc.exitcode}"}
+        if time.time() >= deadline:
+            proc.terminate()
+            return {**config, "error": f"timed out after {timeout:.0f}s"}
+
+
+def run(args) -> list:
+    grid = list(itertools.product(args.batch_sizes, args.seq_lengths, args.threads, args.precision))
+    print(f"🏁 {len(grid)} configs × {args.texts} texts ({args.model})\n")
+    header = f"{'batch':>5} {'seq':>5} {'thr':>4} {'prec':>5} | {'texts/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for batch_size, seq_length, threads, precision in grid:
+        config = {"model": args.model, "batch_size": batch_size, "seq_length": seq_length,
+                  "threads": threads, "precision": precision}
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_config, args=(config, args.texts, queue))
+        proc.start()
+        result = _wait_result(proc, queue, config, args.timeout)
+        proc.join()
+        results.append(result)
+
+        prefix = f"{batch_size:>5} {seq_length:>5} {threads:>4} {precision:>5} | "
+        if "error" in result:
+            print(prefix + f"❌ {result['error']}")
+        else:
+            print(prefix + f"{result['texts_per_sec']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                           f"{result['p99_ms']:>8.1f} {result['peak_rss_mb']:>8.0f}")
+    return results
+
+
+def recommend(results: list, max_p95_ms: float) -> dict:
+    """
+    在 p95 延迟预算内选吞吐最高的配置
+    """
+    ok = [r for r in results if "error" not in r and r["p95_ms"] <= max_p95_ms]
+    if not ok:
+        return None
+    best = max(ok, key=lambda r: r["texts_per_sec"])
+    print(f"\n🏆 Best within p95 ≤ {max_p95_ms:.0f} ms: {best['texts_per_sec']:.1f} texts/s. Put this in .env:")
+    print(f"EMBED_THREADS={best['threads']}")
+    print(f"EMBED_BATCH_SIZE={best['batch_size']}")
+    print(f"EMBED_MAX_SEQ_LENGTH={best['seq_length']}")
+    print(f"EMBED_PRECISION={best['precision']}")
+    return best
+
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark LocalEmbedder throughput")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--texts", type=int, default=512, help="texts per config")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--seq-lengths", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, 2, max(1, cpus // 2), cpus}))
+    parser.add_argument("--precision", nargs="+", default=["fp32", "int8", "bf16"])
+    parser.add_argument("--max-p95-ms", type=float, default=500, help="latency budget per batch for the recommendation")
+    parser.add_argument("--quick", action="store_true", help="small grid: batch 8/32, seq 128, fp32/int8")
+    parser.add_argument("--output", help="write raw results as JSON")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per config before it is reported as failed")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.texts = 128
+        args.batch_sizes = [8, 32]
+        args.seq_lengths = [128]
+        args.precision = ["fp32", "int8"]
+
+    results = run(args)
+    best = recommend(results, args.max_p95_ms)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "best": best}, f, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
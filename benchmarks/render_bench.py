@@ -0,0 +1,90 @@
+"""
+卡片流渲染基准：对比 "每张卡片一次 st.markdown" 和 "整列表一次组件下发"。
+
+在浏览器之外我们能测的是服务端的开销：拼 HTML 的耗时、下发的消息数和字节数。
+每条 st.markdown 都是一条独立的 websocket 消息 + 一次 DOM 插入，所以消息数本身就是关键指标。
+
+用法:
+    python benchmarks/render_bench.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cards import render_card_html, build_feed_html
+
+PAGE_SIZE = 30
+
+SIZES = [50, 500, 5000]
+REPEATS = 5
+
+
+def make_rows(n: int) -> list:
+    rng = random.Random(42)
+    tags = ["LLM", "Vision", "Agent", "Framework", "Hardware", "Audio"]
+    return [
+        {
+            "title": f"org-{i}/model-{i}",
+            "url": f"https://github.com/org-{i}/model-{i}",
+            "summary": "基于 MoE 架构的多模态模型，支持长上下文推理与工具调用。" * 2,
+            "score": rng.randint(6, 10),
+            "tags": rng.choice(tags),
+            "source": rng.choice(["github", "huggingface", "hackernews"]),
+            "date": "Oct 19",
+            "similarity": rng.random(),
+        }
+        for i in range(n)
+    ]
+
+
+_FEED_DATA = re.compile(r'<script id="feed-data" type="application/json">(.*?)</script>', re.S)
+_PAGE = re.compile(r"const PAGE = (\d+);")
+
+
+def initial_dom_cards(payloads: list) -> int:
+    """
+    从生成的 HTML 里数首屏的卡片数：静态标记里的卡片 + 分页脚本首次 renderNextPage() 插入的那一页
+    """
+    total = 0
+    for payload in payloads:
+        data = _FEED_DATA.search(payload)
+        static = _FEED_DATA.sub("", payload)
+        total += static.count('class="sota-card"')
+        if data:
+            cards = json.loads(data.group(1))  # <\/ 是合法的 JSON 转义
+            total += min(len(cards), int(_PAGE.search(payload).group(1)))
+    return total
+
+
+def bench(fn, rows):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        payloads = fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best, len(payloads), sum(len(p.encode("utf-8")) for p in payloads), initial_dom_cards(payloads)
+
+
+def per_card(rows):
+    # 旧实现：每张卡片一条 st.markdown 消息
+    return [render_card_html(row, True) for row in rows]
+
+
+def batched(rows):
+    # 新实现：一个组件，一条消息
+    return [build_feed_html(rows, True, page_size=PAGE_SIZE)]
+
+
+if __name__ == "__main__":
+    print(f"{'items':>6} | {'mode':<9} | {'build ms':>9} | {'messages':>8} | {'bytes':>10} | {'initial DOM cards':>17}")
+    print("-" * 75)
+    for n in SIZES:
+        rows = make_rows(n)
+        for name, fn in [("per-card", per_card), ("batched", batched)]:
+            seconds, messages, size, dom_cards = bench(fn, rows)
+            print(f"{n:>6} | {name:<9} | {seconds * 1000:>9.2f} | {messages:>8} | {size:>10,} | {dom_cards:>17}")
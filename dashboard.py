@@ -2,8 +2,13 @@ import streamlit as st
 import pandas as pd
 import os
 from dotenv import load_dotenv
-from supabase import create_client
-from src.embedder import get_embedding
+import streamlit.components.v1 as components
+from src.stores import create_store
+from src.cards import build_feed_html
+from src.knn_graph import related_items
+from src.dashboard_data import DashboardData
+from src.aggregates import facet_counts, since_days
+from src import profiling
 
 # 1. 页面配置 (居中布局，阅读感更好)
 st.set_page_config(
@@ -30,125 +35,81 @@ st.markdown("""
         border: 1px solid #ddd;
     }
 
-    /* 卡片容器 */
-    .sota-card {
-        background-color: #ffffff;
-        border-radius: 16px;
-        padding: 24px;
-        margin-bottom: 24px;
-        border: 1px solid #f0f0f0;
-        box-shadow: 0 2px 8px rgba(0,0,0,0.04);
-        transition: all 0.3s ease;
-    }
-    
-    .sota-card:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 12px 24px rgba(0,0,0,0.08);
-        border-color: #e0e0e0;
-    }
-
-    /* 头部信息栏 */
-    .card-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: flex-start;
-        margin-bottom: 12px;
-    }
-
-    /* 标签样式 */
-    .tech-tag {
-        display: inline-block;
-        background-color: #f1f5f9;
-        color: #475569;
-        padding: 4px 10px;
-        border-radius: 20px;
-        font-size: 0.75rem;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-
-    /* 分数样式 */
-    .score-badge {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        width: 36px;
-        height: 36px;
-        border-radius: 50%;
-        font-weight: 700;
-        font-size: 0.9rem;
-        color: white;
-    }
-    .score-10, .score-9 { background: linear-gradient(135deg, #10b981, #059669); }
-    .score-8, .score-7 { background: linear-gradient(135deg, #f59e0b, #d97706); }
-    .score-low { background-color: #94a3b8; }
-
-    /* 标题样式 */
-    .card-title {
-        font-size: 1.25rem;
-        font-weight: 700;
-        color: #1e293b;
-        text-decoration: none;
-        margin-bottom: 8px;
-        display: block;
-    }
-    .card-title:hover {
-        color: #2563eb;
-    }
-
-    /* 摘要样式 */
-    .card-summary {
-        color: #475569;
-        font-size: 0.95rem;
-        line-height: 1.6;
-        margin-bottom: 16px;
-    }
-
-    /* 底部元数据 */
-    .card-meta {
-        font-size: 0.8rem;
-        color: #94a3b8;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-    }
 </style>
 """, unsafe_allow_html=True)
 
 # 3. 资源加载
+# 常驻进程默认用本地副本 (replica)：读走本地磁盘，后台增量同步 Supabase
 @st.cache_resource
 def init_resources():
     load_dotenv()
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_KEY")
-    return create_client(url, key)
-
-supabase = init_resources()
-
-# 4. 数据获取 (含 AI 搜索)
-def get_data(query_text=None, min_score=7):
-    if not query_text:
-        # 普通模式
-        response = supabase.table("sota_items") \
-            .select("*") \
-            .gte("score", min_score) \
-            .order("created_at", desc=True) \
-            .limit(50) \
-            .execute()
-        return pd.DataFrame(response.data), False
-    else:
-        # AI 搜索模式
-        query_vector = get_embedding(query_text)
-        response = supabase.rpc(
-            "match_sota_items",
-            {
-                "query_embedding": query_vector,
-                "match_threshold": 0.25, 
-                "match_count": 20
-            }
-        ).execute()
-        return pd.DataFrame(response.data), True
+    return create_store(default="replica")
+
+store = init_resources()
+
+# 4. 数据获取 (含 AI 搜索)，查询逻辑在 src/dashboard_data.py，压测脚本复用同一份
+# 趋势图和筛选计数覆盖的天数 (读聚合表，和总行数无关)
+TREND_DAYS = int(os.getenv("DASHBOARD_TREND_DAYS", "90"))
+
+@st.cache_resource
+def init_data():
+    return DashboardData(store)
+
+data = init_data()
+
+def get_data(query_text=None, min_score=7, mode="Hybrid", tags=None, sources=None):
+    rows, is_search = data.get_data(query_text, min_score, mode, tags, sources)
+    return pd.DataFrame(rows), is_search
+
+# 5. 卡片流渲染 (同样的结果集不重复拼 HTML)
+FEED_HEIGHT = 900
+
+@st.cache_data(show_spinner=False)
+def render_feed(rows, is_search):
+    return build_feed_html(rows, is_search)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_related(item_ids):
+    return related_items(store, list(item_ids))
+
+# 6. 筛选项和趋势图：只读写入时维护的聚合表 (src/aggregates.py)，规模是 天数 × 标签数
+@st.cache_data(ttl=300, show_spinner=False)
+def get_stats(days):
+    try:
+        return store.item_stats(since_days(days))
+    except Exception as e:
+        print(f"⚠️ Aggregates unavailable: {e}")
+        return []
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_top_items(tags):
+    return store.top_items(list(tags) or None, limit=3)
+
+def render_trends(stats, min_score, tags):
+    df = pd.DataFrame(stats)
+    if df.empty:
+        st.caption("No aggregates yet (run `python -m src.aggregates` once to backfill).")
+        return
+    df["day"] = pd.to_datetime(df["day"])
+    if tags:
+        df = df[df["tag"].isin(tags)]
+
+    st.caption(f"Items per day by tag ({min_score}+)")
+    daily = df[df["score"] >= min_score].pivot_table(index="day", columns="tag", values="items", aggfunc="sum", fill_value=0)
+    st.bar_chart(daily)
+
+    t1, t2 = st.columns(2)
+    with t1:
+        st.caption("Average score per day")
+        weighted = df.assign(total=df["score"] * df["items"]).groupby("day")[["total", "items"]].sum()
+        st.line_chart(weighted["total"] / weighted["items"])
+    with t2:
+        st.caption("Score distribution")
+        st.bar_chart(df.groupby("score")["items"].sum())
+
+    st.caption("Top items per tag")
+    for row in get_top_items(tuple(tags)):
+        st.markdown(f"- **[{row['tag'] or 'Untagged'}]** [{row['title']}]({row['url']}) · {row['score']}")
 
 # --- 页面布局 ---
 
@@ -156,16 +117,34 @@ def get_data(query_text=None, min_score=7):
 st.markdown("<h1 style='text-align: center; margin-bottom: 30px;'>⚡ SOTA Watch <span style='font-size:0.5em; color:#94a3b8;'>V4.0</span></h1>", unsafe_allow_html=True)
 
 # 搜索与筛选 (一行两列)
-c1, c2 = st.columns([3, 1])
+c1, c2, c3 = st.columns([3, 1, 1])
 with c1:
-    search = st.text_input("", placeholder="🔍 Search concepts like 'video generation'...", label_visibility="collapsed")
+    search = st.text_input("", placeholder="🔍 Search concepts like 'video generation' or IDs like 'Qwen2.5-VL'...", label_visibility="collapsed")
 with c2:
     # 简单的分数过滤器
     min_val = st.selectbox("Quality", [7, 8, 9], index=0, format_func=lambda x: f"{x}+ Score")
+with c3:
+    # 搜索模式：混合 (默认) / 纯关键词 / 纯语义
+    search_mode = st.selectbox("Mode", ["Hybrid", "Keyword", "Semantic"], index=0, label_visibility="collapsed")
+
+# 标签 / 来源筛选，选项后面的计数来自聚合表
+stats = get_stats(TREND_DAYS)
+facets = facet_counts(stats, min_val)
+f1, f2 = st.columns(2)
+with f1:
+    tag_filter = st.multiselect("Tags", list(facets["tags"]), format_func=lambda t: f"{t or 'Untagged'} ({facets['tags'][t]})",
+                                placeholder="All tags", label_visibility="collapsed")
+with f2:
+    source_filter = st.multiselect("Sources", list(facets["sources"]), format_func=lambda s: f"{s or 'Unknown'} ({facets['sources'][s]})",
+                                   placeholder="All sources", label_visibility="collapsed")
+
+with st.expander(f"📈 Trends (last {TREND_DAYS} days)"):
+    render_trends(stats, min_val, tag_filter)
 
 # 获取数据
 with st.spinner("Scanning database..."):
-    df, is_search = get_data(search, min_val)
+    with profiling.stage("get_data"):
+        df, is_search = get_data(search, min_val, search_mode, tag_filter, source_filter)
 
 # 结果展示
 if df.empty:
@@ -173,40 +152,21 @@ if df.empty:
 else:
     # 统计条
     if is_search:
-        st.caption(f"🤖 Found {len(df)} semantic matches for '{search}'")
+        st.caption(f"🤖 Found {len(df)} {search_mode.lower()} matches for '{search}'")
     else:
         st.caption(f"🕒 Showing latest {len(df)} high-quality items")
 
-    # 渲染卡片流
-    for index, row in df.iterrows():
-        score = row['score']
-        score_class = "score-10" if score >= 9 else ("score-8" if score >= 7 else "score-low")
-        date_str = pd.to_datetime(row['created_at']).strftime('%b %d')
-        source = row['source'].upper()
-        
-        # HTML 模板
-        card_html = f"""
-        <div class="sota-card">
-            <div class="card-header">
-                <span class="tech-tag">{row.get('tags', 'TECH')}</span>
-                <div class="score-badge {score_class}">{score}</div>
-            </div>
-            
-            <a href="{row['url']}" target="_blank" class="card-title">
-                {row['title']} ↗
-            </a>
-            
-            <div class="card-summary">
-                {row['summary']}
-            </div>
-            
-            <div class="card-meta">
-                <span>📅 {date_str}</span>
-                <span>•</span>
-                <span>{source}</span>
-                {f"<span>• Match: {row['similarity']*100:.0f}%</span>" if is_search and 'similarity' in row else ""}
-            </div>
-        </div>
-        """
-        st.markdown(card_html, unsafe_allow_html=True)
-        
\ No newline at end of file
+    # 渲染卡片流：整个列表打包成一个组件一次下发，滚动时按页追加
+    rows = df.drop(columns=['embedding'], errors='ignore').assign(date=pd.to_datetime(df['created_at']).dt.strftime('%b %d')).to_dict("records")
+    # 相关条目来自预计算的 kNN 图：一次批量查询，不做实时向量检索
+    try:
+        related = get_related(tuple(row['id'] for row in rows))
+        for row in rows:
+            row['related'] = related.get(row['id'], [])
+    except Exception as e:
+        print(f"⚠️ Related items unavailable: {e}")
+    with profiling.stage("render"):
+        components.html(render_feed(rows, is_search), height=FEED_HEIGHT, scrolling=True)
+
+# dashboard 进程不退出，每次 rerun 结束都把累计的 profile 写一遍 (SOTA_PROFILE 未设置时直接返回)
+profiling.flush()
@@ -1,21 +1,36 @@
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from src.stores import create_store
 
 load_dotenv()
 
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
+# STORAGE_BACKEND=local 时只初始化本地 SQLite，不需要任何凭证
+try:
+    store = create_store()
+except Exception as e:
+    print(f"❌ Error: {e}")
+    exit(1)
 
-if not url or not key:
-    print("❌ Error: Missing SUPABASE variables in .env")
-    exit()
+# 有 DATABASE_URL 时先把表结构 / 索引 / RPC 迁移到最新版本 (见 src/migrations.py)
+if store.name != "local":
+    if os.getenv("DATABASE_URL"):
+        from src.migrations import connect, migrate, check_plans, PlanCheckError
+        try:
+            with connect() as conn:
+                migrate(conn)
+                # 迁移完确认 dedup / 卡片流 / 向量检索等查询真的走索引，不通过就以非 0 退出 (CI 里会失败)
+                check_plans(conn)
+        except PlanCheckError as e:
+            print(f"❌ Query Plan Check Failed: {e}")
+            exit(1)
+        except Exception as e:
+            print(f"❌ Migration Failed: {e}")
+            exit(1)
+    else:
+        print("💡 DATABASE_URL not set, skipping schema migrations (run `python -m src.migrations sql` and apply the SQL manually).")
 
-print("🔌 Connecting to Supabase...")
+print(f"🔌 Connecting to storage backend ({store.name})...")
 try:
-    # 初始化客户端
-    supabase: Client = create_client(url, key)
-    
     # 测试插入一条假数据
     data = {
         "title": "Test Database Connection",
@@ -27,12 +42,12 @@ try:
     }
     
     # 执行插入
-    response = supabase.table("sota_items").insert(data).execute()
+    inserted = store.insert([data])
     
-    print("✅ Success! Inserted data:", response.data)
+    print("✅ Success! Inserted data:", inserted)
     
 except Exception as e:
     print(f"❌ Connection Failed: {e}")
     # 常见错误：如果是 duplicate key value，说明你已经运行过一次了，也是成功的标志
-    if "duplicate key" in str(e):
-        print("💡 (This means the connection is working, but the test data already exists.)")
\ No newline at end of file
+    if "duplicate key" in str(e) or "UNIQUE constraint" in str(e):
+        print("💡 (This means the connection is working, but the test data already exists.)")
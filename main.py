@@ -1,41 +1,30 @@
+import os
 import sys
 import logging
 import time
 
 from src.fetcher import fetch_all_data
 from src.processor import process_data
-from src.notifier import send_notification
+from src.notifier import send_notification, flush_outbox, drain
 # [新增] 引入存储模块
-from src.storage import filter_new_items, save_items
+from src.storage import filter_new_items, save_items, store
+from src.knn_graph import topic_clusters, format_clusters
+from src.leases import claim_items, release_items
+# SOTA_PROFILE=1 时按阶段输出 cProfile / 内存 / HTTP 耗时到 profiles/，不设置时 stage() 是空操作
+from src.profiling import stage
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def run_pipeline():
-    logger.info("🚀 SOTA Watch Pipeline Started (V0.2 with DB)")
-
-    # --- Step 1: 抓取 ---
-    logger.info("📡 Step 1: Fetching data...")
-    try:
-        raw_data = fetch_all_data()
-        if not raw_data:
-            logger.warning("⚠️ No data fetched. Stop.")
-            return
-    except Exception as e:
-        logger.error(f"❌ Fetcher Error: {e}")
-        return
-
-    # --- [新增] Step 1.5: 去重 ---
-    # 这一步非常关键！它决定了我们是不是在做无用功
-    try:
-        new_data = filter_new_items(raw_data)
-        if not new_data:
-            logger.info("💤 All items have been processed before. Nothing new.")
-            return
-        logger.info(f"✨ Found {len(new_data)} NEW items to analyze.")
-    except Exception as e:
-        logger.error(f"❌ Deduplication Error: {e}")
-        new_data = raw_data # 降级策略
+def analyze_and_publish(new_data: list) -> bool:
+    """
+    Step 2 ~ 3：分析 -> 存档 -> 推送。单次运行和 daemon 模式共用。
+    """
+    # 先按 URL 抢租约：并发的运行 / 其它分片的 runner 不会重复分析同一条
+    new_data = claim_items(store, new_data)
+    if not new_data:
+        logger.info("🔒 Every new item is being handled by another worker.")
+        return True
 
     # --- Step 2: 分析 ---
     logger.info("🧠 Step 2: Analyzing with AI...")
@@ -43,7 +32,8 @@ def run_pipeline():
         # 注意：现在我们传入的是 new_data (去重后的数据)
         # Processor 里的 [:5] 限制依然存在用于测试，但在生产环境有了去重后，
         # 这里的 new_data 通常本身就不会太多，所以是安全的。
-        report = process_data(new_data)
+        with stage("analyze"):
+            report = process_data(new_data)
         
         # [新增] 提取出高分项目用于存储
         # 我们的 process_data 返回的是字符串报告，
@@ -55,16 +45,30 @@ def run_pipeline():
             item for item in new_data 
             if item.get('score', 0) >= 6  # 只存 6 分以上的
         ]
+
+        # LLM 出错的条目没有结论，租约马上还回去；打过分被拒的留着租约，到期前不重复分析
+        failed = [item for item in new_data if item.get('_analysis_failed')]
+        if failed:
+            release_items(store, failed)
         
     except Exception as e:
         logger.error(f"❌ Processor Error: {e}")
-        return
+        # 整批都算没有结论：租约还回去，daemon 也不会让它们进冷却期
+        for item in new_data:
+            item['_analysis_failed'] = True
+        release_items(store, new_data)
+        return False
 
     # --- [新增] Step 2.5: 存档 ---
     logger.info("💾 Step 2.5: Saving to database...")
     try:
         if high_quality_items:
-            save_items(high_quality_items)
+            with stage("save"):
+                saved = save_items(high_quality_items)
+                # 已入库的条目靠 URL 去重就够了，租约行删掉
+                release_items(store, saved)
+                # 用预计算的 kNN 图把今天的条目聚成主题，附在报告末尾
+                report += format_clusters(topic_clusters(store, saved))
         else:
             logger.info("📭 No high-score items to save.")
     except Exception as e:
@@ -76,16 +80,60 @@ def run_pipeline():
         if "No high-score updates" in report or len(high_quality_items) == 0:
             logger.info("🔕 Low signal, skipping notification.")
         else:
-            send_notification(report)
-            logger.info("✅ Notification sent.")
+            with stage("notify"):
+                send_notification(report)
+            logger.info("✅ Notification queued.")
     except Exception as e:
         logger.error(f"❌ Notifier Error: {e}")
+        return False
+
+    return True
+
+def run_pipeline():
+    logger.info("🚀 SOTA Watch Pipeline Started (V0.2 with DB)")
+
+    # 上次没送达的通知先放进后台队列补发，不阻塞抓取
+    flush_outbox()
+
+    # --- Step 1: 抓取 ---
+    logger.info("📡 Step 1: Fetching data...")
+    try:
+        with stage("fetch"):
+            raw_data = fetch_all_data()
+        if not raw_data:
+            logger.warning("⚠️ No data fetched. Stop.")
+            return
+    except Exception as e:
+        logger.error(f"❌ Fetcher Error: {e}")
         return
 
+    # --- [新增] Step 1.5: 去重 ---
+    # 这一步非常关键！它决定了我们是不是在做无用功
+    try:
+        with stage("dedup"):
+            new_data = filter_new_items(raw_data)
+        if not new_data:
+            logger.info("💤 All items have been processed before. Nothing new.")
+            return
+        logger.info(f"✨ Found {len(new_data)} NEW items to analyze.")
+    except Exception as e:
+        logger.error(f"❌ Deduplication Error: {e}")
+        new_data = raw_data # 降级策略
+
+    analyze_and_publish(new_data)
+
     logger.info("🎉 Pipeline Finished.")
 
 if __name__ == "__main__":
+    if "--daemon" in sys.argv:
+        # 常驻模式：模型和连接池保持热状态，各数据源按自己的间隔轮询
+        from src.daemon import run_daemon
+        run_daemon(analyze_and_publish)
+        sys.exit(0)
+
     start_time = time.time()
     run_pipeline()
     print(f"\n⏱️ Execution Time: {time.time() - start_time:.2f}s")
+    # 给后台投递一点时间收尾；没发完的留在 outbox，下次运行补发
+    drain(timeout=float(os.getenv("NOTIFY_DRAIN_TIMEOUT", "30")))
     
\ No newline at end of file
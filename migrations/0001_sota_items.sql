@@ -0,0 +1,21 @@
+-- 基础表。老库是手工建的，这里全部 if not exists，可以直接在已有的库上跑
+create extension if not exists vector;
+
+create table if not exists sota_items (
+    id bigint generated by default as identity primary key,
+    title text,
+    url text not null,
+    summary text,
+    score integer default 0,
+    tags text,
+    source text,
+    publish_date text,
+    created_at timestamptz not null default now(),
+    embedding vector(${EMBEDDING_DIM}),
+    embedding_model text
+);
+
+alter table sota_items add column if not exists embedding_model text;
+
+-- 去重 (filter_new_items / existing_urls) 走这个索引；名字和 "url text unique" 自动生成的约束一致，老库上会直接跳过
+create unique index if not exists sota_items_url_key on sota_items (url);
@@ -0,0 +1,5 @@
+-- dashboard 卡片流: where score >= ? order by created_at desc limit ?
+-- 阈值宽 (7+) 时按时间倒序扫、顺带过滤 score，拿够 limit 行就停
+create index if not exists sota_items_created_score_idx on sota_items (created_at desc, score);
+-- 阈值窄 (9+) 时先按 score 范围缩小
+create index if not exists sota_items_score_created_idx on sota_items (score, created_at desc);
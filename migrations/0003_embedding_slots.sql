@@ -0,0 +1,3 @@
+-- 第二个向量槽位，换模型时后台 backfill，切换前搜索仍然读 embedding (见 src/embedder.py)
+alter table sota_items add column if not exists embedding_next vector(${EMBEDDING_NEXT_DIM});
+alter table sota_items add column if not exists embedding_next_model text;
@@ -0,0 +1,3 @@
+-- 近似最近邻索引。方法和参数来自环境变量 (VECTOR_INDEX=hnsw|ivfflat, HNSW_M, HNSW_EF_CONSTRUCTION, IVF_LISTS)
+-- 改参数后用 `python -m src.migrations reindex` 重建，不需要新迁移
+${VECTOR_INDEXES}
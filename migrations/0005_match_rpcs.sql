@@ -0,0 +1,41 @@
+-- 向量检索 RPC (SupabaseStore.match_items)。返回列和 LIST_COLUMNS + similarity 一致。
+-- order by 必须直接是 <=> 距离，planner 才会走向量索引；阈值在索引扫描之后过滤
+drop function if exists match_sota_items(vector, double precision, integer);
+create function match_sota_items(query_embedding vector(${EMBEDDING_DIM}), match_threshold double precision, match_count integer)
+returns table (
+    id bigint, title text, url text, summary text, score integer, tags text, source text,
+    publish_date text, created_at timestamptz, similarity double precision
+)
+language sql stable
+set ${SEARCH_GUC}
+as $$
+    select * from (
+        select s.id, s.title, s.url, s.summary, s.score, s.tags, s.source, s.publish_date, s.created_at,
+               1 - (s.embedding <=> query_embedding) as similarity
+        from sota_items s
+        where s.embedding is not null
+        order by s.embedding <=> query_embedding
+        limit match_count
+    ) hits
+    where hits.similarity > match_threshold;
+$$;
+
+drop function if exists match_sota_items_next(vector, double precision, integer);
+create function match_sota_items_next(query_embedding vector(${EMBEDDING_NEXT_DIM}), match_threshold double precision, match_count integer)
+returns table (
+    id bigint, title text, url text, summary text, score integer, tags text, source text,
+    publish_date text, created_at timestamptz, similarity double precision
+)
+language sql stable
+set ${SEARCH_GUC}
+as $$
+    select * from (
+        select s.id, s.title, s.url, s.summary, s.score, s.tags, s.source, s.publish_date, s.created_at,
+               1 - (s.embedding_next <=> query_embedding) as similarity
+        from sota_items s
+        where s.embedding_next is not null
+        order by s.embedding_next <=> query_embedding
+        limit match_count
+    ) hits
+    where hits.similarity > match_threshold;
+$$;
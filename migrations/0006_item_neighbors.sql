@@ -0,0 +1,7 @@
+-- kNN 图 (src/knn_graph.py)：每个条目存 K 条出边，按 item_id 批量读
+create table if not exists sota_item_neighbors (
+    item_id bigint not null references sota_items (id) on delete cascade,
+    neighbor_id bigint not null references sota_items (id) on delete cascade,
+    similarity real not null,
+    primary key (item_id, neighbor_id)
+);
@@ -0,0 +1,20 @@
+-- URL 租约 (src/leases.py)：并发运行 / 多个分片 runner 不重复分析同一条目
+create table if not exists sota_item_leases (
+    url text primary key,
+    worker text not null,
+    expires_at timestamptz not null
+);
+
+-- 原子抢占：没人持有、已过期或本来就是自己的才更新；returning 只返回真正拿到的行
+create or replace function claim_sota_item_leases(urls text[], worker text, ttl_seconds integer)
+returns setof text
+language sql volatile
+as $$
+    insert into sota_item_leases as l (url, worker, expires_at)
+    select distinct u, claim_sota_item_leases.worker, now() + make_interval(secs => claim_sota_item_leases.ttl_seconds)
+    from unnest(claim_sota_item_leases.urls) as u
+    on conflict (url) do update
+        set worker = excluded.worker, expires_at = excluded.expires_at
+        where l.expires_at < now() or l.worker = excluded.worker
+    returning l.url;
+$$;
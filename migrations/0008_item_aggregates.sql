@@ -0,0 +1,54 @@
+-- 写入时增量维护的聚合 (src/aggregates.py)，dashboard 的筛选项和趋势图只读这两张表
+-- 天 × 标签 × 来源 × 分数 的计数：按天/标签/来源的数量、分数直方图都从这里汇总
+create table if not exists sota_item_stats (
+    day date not null,
+    tag text not null,
+    source text not null,
+    score integer not null,
+    items integer not null default 0,
+    primary key (day, tag, source, score)
+);
+
+-- 每个标签分数最高的 N 条
+create table if not exists sota_top_items (
+    tag text not null,
+    item_id bigint not null references sota_items (id) on delete cascade,
+    score integer not null,
+    created_at timestamptz,
+    title text,
+    url text,
+    primary key (tag, item_id)
+);
+create index if not exists sota_top_items_rank_idx on sota_top_items (tag, score desc, created_at desc);
+
+-- 并发运行同时写入时计数要原子累加，所以放在库里做
+create or replace function record_sota_item_stats(new_items jsonb, top_n integer)
+returns void
+language plpgsql
+as $$
+begin
+    insert into sota_item_stats as s (day, tag, source, score, items)
+    select (i->>'created_at')::timestamptz::date,
+           coalesce(i->>'tags', ''),
+           coalesce(i->>'source', ''),
+           coalesce((i->>'score')::integer, 0),
+           count(*)
+    from jsonb_array_elements(new_items) as i
+    group by 1, 2, 3, 4
+    on conflict (day, tag, source, score) do update set items = s.items + excluded.items;
+
+    insert into sota_top_items (tag, item_id, score, created_at, title, url)
+    select coalesce(i->>'tags', ''), (i->>'id')::bigint, coalesce((i->>'score')::integer, 0),
+           (i->>'created_at')::timestamptz, i->>'title', i->>'url'
+    from jsonb_array_elements(new_items) as i
+    on conflict (tag, item_id) do nothing;
+
+    delete from sota_top_items t
+    using (
+        select r.tag, r.item_id, row_number() over (partition by r.tag order by r.score desc, r.created_at desc) as rank
+        from sota_top_items r
+        where r.tag in (select distinct coalesce(i->>'tags', '') from jsonb_array_elements(new_items) as i)
+    ) ranked
+    where t.tag = ranked.tag and t.item_id = ranked.item_id and ranked.rank > top_n;
+end;
+$$;
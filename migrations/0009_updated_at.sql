@@ -0,0 +1,21 @@
+-- 副本同步 (ReplicaStore.sync) 按 updated_at 增量拉取：
+-- id 水位线会漏掉乱序提交的行 (并发 writer / 多个分片)，也拉不到老行上的更新
+alter table sota_items add column if not exists updated_at timestamptz not null default now();
+
+create or replace function sota_items_touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists sota_items_touch_updated_at on sota_items;
+create trigger sota_items_touch_updated_at
+    before update on sota_items
+    for each row execute function sota_items_touch_updated_at();
+
+-- where updated_at >= ? order by updated_at, id limit ?
+create index if not exists sota_items_updated_idx on sota_items (updated_at, id);
@@ -0,0 +1,18 @@
+-- 过期租约只有同一个 URL 再被抢时才会被覆盖，被拒的条目永远不会再来，表会一直涨。
+-- 每次抢占前顺手清掉过期的行 (已入库条目的租约在保存后由 release_urls 删掉)
+create index if not exists sota_item_leases_expires_idx on sota_item_leases (expires_at);
+
+create or replace function claim_sota_item_leases(urls text[], worker text, ttl_seconds integer)
+returns setof text
+language sql volatile
+as $$
+    delete from sota_item_leases where expires_at < now();
+
+    insert into sota_item_leases as l (url, worker, expires_at)
+    select distinct u, claim_sota_item_leases.worker, now() + make_interval(secs => claim_sota_item_leases.ttl_seconds)
+    from unnest(claim_sota_item_leases.urls) as u
+    on conflict (url) do update
+        set worker = excluded.worker, expires_at = excluded.expires_at
+        where l.expires_at < now() or l.worker = excluded.worker
+    returning l.url;
+$$;
@@ -0,0 +1,65 @@
+import os
+import logging
+import datetime
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# 每个标签保留多少条 "最高分" 条目
+TOP_PER_TAG = int(os.getenv("AGGREGATE_TOP_PER_TAG", "10"))
+STAT_FIELDS = "id,title,url,score,tags,source,created_at"
+
+
+def _stat_item(row: dict) -> dict:
+    # 只把聚合需要的列发给存储 (RPC 参数里不要带向量)
+    return {key: row.get(key) for key in STAT_FIELDS.split(",")}
+
+
+def update_aggregates(store, saved: list) -> int:
+    """
+    save_items 写入后调用：把新行计入 天 × 标签 × 来源 × 分数 的计数，并刷新各标签的 top N
+    """
+    items = [_stat_item(row) for row in saved if row.get("id") is not None]
+    store.record_stats(items, TOP_PER_TAG)
+    return len(items)
+
+
+def rebuild_aggregates(store, batch_size: int = 1000) -> int:
+    """
+    从 sota_items 全量重算 (首次上线，或者聚合表和明细对不上时)
+    """
+    store.clear_stats()
+    total, after = 0, 0
+    while True:
+        rows = store.rows_after(after, batch_size, STAT_FIELDS)
+        if rows:
+            store.record_stats([_stat_item(row) for row in rows], TOP_PER_TAG)
+            total += len(rows)
+        if len(rows) < batch_size:
+            break
+        after = rows[-1]["id"]
+    print(f"📊 [Aggregates] Rebuilt from {total} items.")
+    return total
+
+
+def since_days(days: int) -> str:
+    return (datetime.date.today() - datetime.timedelta(days=days)).isoformat()
+
+
+def facet_counts(stats: list, min_score: int = 0) -> dict:
+    """
+    {"tags": {tag: n}, "sources": {source: n}}，按数量降序，给筛选项显示计数用
+    """
+    tags, sources = defaultdict(int), defaultdict(int)
+    for row in stats:
+        if row["score"] >= min_score:
+            tags[row["tag"]] += row["items"]
+            sources[row["source"]] += row["items"]
+    order = lambda counts: dict(sorted(counts.items(), key=lambda kv: kv[1], reverse=True))
+    return {"tags": order(tags), "sources": order(sources)}
+
+
+if __name__ == "__main__":
+    # 首次上线后回填聚合表：python -m src.aggregates
+    from src.stores import create_store
+    rebuild_aggregates(create_store())
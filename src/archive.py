@@ -0,0 +1,277 @@
+import os
+import time
+import uuid
+import logging
+import datetime
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 归档是可选功能，没装 pyarrow 时 pipeline 照常运行
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# 按天分区: archive/date=2026-10-19/run-083000-1a2b3c4d.arrow
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# 向量是由什么文本算出来的 (记在分区的 schema metadata 里，两种向量不可混用)：
+#   candidate: 标题 + 原始描述 (prescorer.candidate_text)，archive_outcomes 写入，预打分训练用的就是这种
+#   item:      标题 + 摘要 + 标签 (save_items / backfill 存进 sota_items 的)，export_history 写入
+TEXT_CANDIDATE = "candidate"
+TEXT_ITEM = "item"
+
+# 标量列；embedding 另外作为定长 float32 列追加
+_SCALAR_FIELDS = [
+    ("url", "string"),
+    ("title", "string"),
+    ("source", "string"),
+    ("description", "string"),
+    ("publish_date", "string"),
+    ("summary", "string"),
+    ("tag", "string"),
+    ("score", "int16"),
+    ("is_noise", "bool_"),
+    ("prescore", "float32"),
+    ("analyzed_at", "float64"),
+    ("embedding_model", "string"),
+]
+
+
+def _scalar_schema():
+    return pa.schema([pa.field(name, getattr(pa, kind)()) for name, kind in _SCALAR_FIELDS])
+
+
+def write_partition(records: list, day: str = None, text_kind: str = TEXT_CANDIDATE, prefix: str = "run") -> str:
+    """
+    把一批记录写成一个未压缩的 Arrow IPC 文件 (未压缩才能 mmap 零拷贝)。
+    records: 字段同 _SCALAR_FIELDS，外加 "embedding" (list[float])。返回文件路径。
+    一个分区只放同一个模型、同一维度、同一种文本的向量 (以第一条为准)，三者都记在 schema metadata 里。
+    """
+    if pa is None:
+        logger.warning("pyarrow not installed, skipping archive.")
+        return None
+    records = [r for r in records if r.get("embedding")]
+    if not records:
+        return None
+
+    model_spec = records[0].get("embedding_model")
+    dim = len(records[0]["embedding"])
+    records = [r for r in records if len(r["embedding"]) == dim and r.get("embedding_model") == model_spec]
+    columns = {name: [r.get(name) for r in records] for name, _ in _SCALAR_FIELDS}
+    # 定长 list：底层就是一块连续的 float32，mmap 后可以零拷贝 reshape 成 (n, dim)
+    flat = np.asarray([r["embedding"] for r in records], dtype=np.float32).ravel()
+    embedding = pa.FixedSizeListArray.from_arrays(pa.array(flat, type=pa.float32()), dim)
+    table = pa.Table.from_pydict(columns, schema=_scalar_schema()).append_column("embedding", embedding)
+    table = table.replace_schema_metadata({
+        "embedding_model": model_spec or "",
+        "embedding_dim": str(dim),
+        "embedding_text": text_kind,
+    })
+
+    day = day or datetime.date.today().isoformat()
+    directory = os.path.join(ARCHIVE_DIR, f"date={day}")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{prefix}-{time.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.arrow")
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+def archive_outcomes(analyzed: list) -> str:
+    """
+    归档一次运行里所有经过 LLM 的条目 (含被拒的)。analyzed: [(item, analysis_or_None), ...]
+    候选向量优先复用预打分时算好的 item["_embedding"]，缺的再批量补算。
+    """
+    if pa is None or not analyzed:
+        return None
+    from src.embedder import get_embedder, EMBEDDING_SLOTS
+    from src.prescorer import candidate_text
+
+    missing = [item for item, _ in analyzed if not item.get("_embedding")]
+    if missing:
+        vectors = get_embedder().generate_embeddings([candidate_text(item) for item in missing])
+        for item, vector in zip(missing, vectors):
+            item["_embedding"] = vector
+
+    now = time.time()
+    records = []
+    for item, analysis in analyzed:
+        analysis = analysis or {}
+        records.append({
+            "url": item.get("url"),
+            "title": item.get("title"),
+            "source": item.get("source"),
+            "description": item.get("description"),
+            "publish_date": item.get("publish_date"),
+            "summary": analysis.get("summary"),
+            "tag": analysis.get("tag"),
+            "score": analysis.get("score"),
+            "is_noise": analysis.get("is_noise"),
+            "prescore": item.get("_prescore"),
+            "analyzed_at": now,
+            "embedding_model": EMBEDDING_SLOTS["embedding"],
+            "embedding": item["_embedding"],
+        })
+    path = write_partition(records)
+    if path:
+        print(f"🗄️ [Archive] {len(records)} analyzed items -> {path}")
+    return path
+
+
+def export_history(store) -> int:
+    """
+    把 sota_items 的历史行 (带向量的) 按 created_at 日期导出成分区，首次使用时跑一次。
+    只导出由当前 embedding 模型生成、维度一致的行：embedding_model 为空或是别的模型的行
+    (迁移中途 / 没 backfill 过) 和其它向量混在一列里就分不清了，先跑 backfill_vectors.py 再导。
+    库里的向量是 标题+摘要+标签 算的，分区标成 TEXT_ITEM，load_archive 默认不会把它们和候选向量混在一起。
+    """
+    from src.embedder import get_embedder, EMBEDDING_SLOTS
+    model_spec = EMBEDDING_SLOTS["embedding"]
+    dim = get_embedder(model_spec).dim
+
+    by_day = {}
+    after, skipped = 0, 0
+    while True:
+        rows = store.rows_after(after, 1000, "id,title,url,summary,score,tags,source,publish_date,created_at,embedding,embedding_model")
+        for row in rows:
+            if not row.get("embedding"):
+                continue
+            if row.get("embedding_model") != model_spec or len(row["embedding"]) != dim:
+                skipped += 1
+                continue
+            day = str(row.get("created_at") or "")[:10] or "unknown"
+            by_day.setdefault(day, []).append({
+                "url": row["url"],
+                "title": row.get("title"),
+                "source": row.get("source"),
+                "publish_date": row.get("publish_date"),
+                "summary": row.get("summary"),
+                "tag": row.get("tags"),
+                "score": row.get("score"),
+                # sota_items 不记录 is_noise (只存了通过筛选的条目)，不硬填
+                "is_noise": None,
+                "embedding_model": row.get("embedding_model"),
+                "embedding": row["embedding"],
+            })
+        if len(rows) < 1000:
+            break
+        after = rows[-1]["id"]
+
+    total = 0
+    for day, records in sorted(by_day.items()):
+        if write_partition(records, day, text_kind=TEXT_ITEM, prefix="history"):
+            total += len(records)
+    print(f"🗄️ [Archive] Exported {total} historical items into {len(by_day)} partition(s).")
+    if skipped:
+        print(f"⚠️ [Archive] Skipped {skipped} item(s) not embedded with {model_spec} (run backfill_vectors.py first).")
+    return total
+
+
+def load_archive(directory: str = ARCHIVE_DIR, columns: list = None, since: str = None, text_kind: str = TEXT_CANDIDATE):
+    """
+    内存映射加载全部分区，返回 pyarrow.Table。数据不会被读进堆内存，按需由 OS 分页。
+    since: 只加载 >= 该日期 (YYYY-MM-DD) 的分区。
+    text_kind: 只加载这种文本算出来的向量 (默认 candidate，和预打分同一口径)；None 表示不过滤。
+    早期没记录 embedding_text 的分区来源不明，只在 text_kind=None 时加载。
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required to load the archive (pip install pyarrow)")
+    tables = []
+    if os.path.isdir(directory):
+        for part in sorted(os.listdir(directory)):
+            if not part.startswith("date=") or (since and part[5:] < since):
+                continue
+            for name in sorted(os.listdir(os.path.join(directory, part))):
+                path = os.path.join(directory, part, name)
+                if name.endswith(".arrow"):
+                    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+                elif name.endswith(".parquet"):
+                    table = pq.read_table(path, memory_map=True)
+                else:
+                    continue
+                if text_kind is not None and archive_text_kind(table) != text_kind:
+                    continue
+                tables.append(table.select(columns) if columns else table)
+    if not tables:
+        return None
+    # 换过模型后不同分区的向量不可比，只合并和第一个分区同模型、同 schema 的
+    schema, model_spec = tables[0].schema, archive_model(tables[0])
+    return pa.concat_tables([
+        t for t in tables
+        if t.schema.equals(schema) and archive_model(t) in (model_spec, None)
+    ])
+
+
+def archive_text_kind(table) -> str:
+    """
+    分区向量对应的文本种类 (TEXT_CANDIDATE / TEXT_ITEM)；没记录的返回 None
+    """
+    metadata = table.schema.metadata or {}
+    value = metadata.get(b"embedding_text")
+    return value.decode("utf-8") if value else None
+
+
+def archive_model(table) -> str:
+    """
+    分区的 embedding 模型 (schema metadata)；早期没记录的分区返回 None
+    """
+    metadata = table.schema.metadata or {}
+    value = metadata.get(b"embedding_model")
+    return value.decode("utf-8") if value else None
+
+
+def embedding_matrix(table) -> np.ndarray:
+    """
+    embedding 列 -> (n, dim) float32。单个 chunk 时是 mmap 上的零拷贝视图；多个 chunk 才拼接一次。
+    """
+    column = table.column("embedding")
+    dim = column.type.list_size
+    blocks = [
+        chunk.values.to_numpy(zero_copy_only=True)[chunk.offset * dim:(chunk.offset + len(chunk)) * dim].reshape(-1, dim)
+        for chunk in column.chunks
+    ]
+    if len(blocks) == 1:
+        return blocks[0]
+    return np.concatenate(blocks) if blocks else np.zeros((0, dim), dtype=np.float32)
+
+
+def to_parquet(output_dir: str, directory: str = ARCHIVE_DIR) -> int:
+    """
+    Arrow 分区 -> 同样分区结构的 Parquet (给 DuckDB / pandas / Spark 等外部工具用)
+    """
+    count = 0
+    for part in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        for name in sorted(os.listdir(os.path.join(directory, part))):
+            if not name.endswith(".arrow"):
+                continue
+            table = pa.ipc.open_file(pa.memory_map(os.path.join(directory, part, name), "r")).read_all()
+            os.makedirs(os.path.join(output_dir, part), exist_ok=True)
+            pq.write_table(table, os.path.join(output_dir, part, name.replace(".arrow", ".parquet")))
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+    # python -m src.archive export          导出 sota_items 历史
+    # python -m src.archive parquet <dir>   转成 Parquet
+    # python -m src.archive                 统计加载耗时
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        from src.stores import create_store
+        export_history(create_store())
+    elif len(sys.argv) > 2 and sys.argv[1] == "parquet":
+        print(f"✅ Wrote {to_parquet(sys.argv[2])} Parquet file(s) to {sys.argv[2]}")
+    else:
+        start = time.perf_counter()
+        table = load_archive()
+        if table is None:
+            print("📭 Archive is empty.")
+        else:
+            matrix = embedding_matrix(table)
+            print(f"✅ Loaded {table.num_rows} rows, embeddings {matrix.shape} in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,210 @@
+import html
+import json
+import math
+
+# 卡片流的样式，只随组件 HTML 一起下发一次，不再每次 rerun 走 st.markdown
+CARD_CSS = """
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap');
+
+    body { margin: 0; font-family: 'Inter', sans-serif; background: transparent; }
+
+    /* 卡片容器 */
+    .sota-card {
+        background-color: #ffffff;
+        border-radius: 16px;
+        padding: 24px;
+        margin-bottom: 24px;
+        border: 1px solid #f0f0f0;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.04);
+        transition: all 0.3s ease;
+        /* 视口外的卡片浏览器直接跳过布局和绘制 (虚拟化) */
+        content-visibility: auto;
+        contain-intrinsic-size: auto 220px;
+    }
+
+    .sota-card:hover {
+        transform: translateY(-4px);
+        box-shadow: 0 12px 24px rgba(0,0,0,0.08);
+        border-color: #e0e0e0;
+    }
+
+    /* 头部信息栏 */
+    .card-header {
+        display: flex;
+        justify-content: space-between;
+        align-items: flex-start;
+        margin-bottom: 12px;
+    }
+
+    /* 标签样式 */
+    .tech-tag {
+        display: inline-block;
+        background-color: #f1f5f9;
+        color: #475569;
+        padding: 4px 10px;
+        border-radius: 20px;
+        font-size: 0.75rem;
+        font-weight: 600;
+        text-transform: uppercase;
+        letter-spacing: 0.5px;
+    }
+
+    /* 分数样式 */
+    .score-badge {
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        width: 36px;
+        height: 36px;
+        border-radius: 50%;
+        font-weight: 700;
+        font-size: 0.9rem;
+        color: white;
+    }
+    .score-10, .score-9 { background: linear-gradient(135deg, #10b981, #059669); }
+    .score-8, .score-7 { background: linear-gradient(135deg, #f59e0b, #d97706); }
+    .score-low { background-color: #94a3b8; }
+
+    /* 标题样式 */
+    .card-title {
+        font-size: 1.25rem;
+        font-weight: 700;
+        color: #1e293b;
+        text-decoration: none;
+        margin-bottom: 8px;
+        display: block;
+    }
+    .card-title:hover {
+        color: #2563eb;
+    }
+
+    /* 摘要样式 */
+    .card-summary {
+        color: #475569;
+        font-size: 0.95rem;
+        line-height: 1.6;
+        margin-bottom: 16px;
+    }
+
+    /* 相关条目 (kNN 图) */
+    .card-related {
+        margin-top: 14px;
+        padding-top: 12px;
+        border-top: 1px dashed #e2e8f0;
+        font-size: 0.8rem;
+        color: #94a3b8;
+        display: flex;
+        flex-wrap: wrap;
+        gap: 8px;
+    }
+    .card-related a {
+        color: #475569;
+        background-color: #f8fafc;
+        border-radius: 12px;
+        padding: 2px 10px;
+        text-decoration: none;
+    }
+    .card-related a:hover {
+        color: #2563eb;
+    }
+
+    /* 底部元数据 */
+    .card-meta {
+        font-size: 0.8rem;
+        color: #94a3b8;
+        display: flex;
+        align-items: center;
+        gap: 12px;
+    }
+"""
+
+# 滚动到底部附近时再追加下一页卡片，DOM 里只有用户真正看过的部分
+_FEED_SCRIPT = """
+    const cards = JSON.parse(document.getElementById("feed-data").textContent);
+    const feed = document.getElementById("feed");
+    const sentinel = document.getElementById("sentinel");
+    const PAGE = %d;
+    let rendered = 0;
+
+    function renderNextPage() {
+        const end = Math.min(rendered + PAGE, cards.length);
+        if (rendered >= end) return;
+        feed.insertAdjacentHTML("beforeend", cards.slice(rendered, end).join(""));
+        rendered = end;
+        if (rendered >= cards.length) observer.disconnect();
+    }
+
+    const observer = new IntersectionObserver((entries) => {
+        if (entries.some(e => e.isIntersecting)) renderNextPage();
+    }, { rootMargin: "800px" });
+
+    renderNextPage();
+    observer.observe(sentinel);
+"""
+
+
+def score_class(score) -> str:
+    return "score-10" if score >= 9 else ("score-8" if score >= 7 else "score-low")
+
+
+def render_card_html(row: dict, is_search: bool = False) -> str:
+    """
+    单张卡片的 HTML。row 需要包含 title/url/summary/score/tags/source/date 字段。
+    所有来自数据库的文本都会转义，避免标题里的 <、& 把页面搞乱。
+    """
+    score = row.get('score', 0)
+    similarity = row.get('similarity')
+    match_html = ""
+    # 混合搜索里关键词命中没有相似度，经过 DataFrame 会变成 NaN
+    if is_search and isinstance(similarity, (int, float)) and math.isfinite(similarity):
+        match_html = f"<span>• Match: {similarity * 100:.0f}%</span>"
+
+    related_html = ""
+    if row.get('related'):
+        links = "".join(
+            f'<a href="{html.escape(str(r.get("url", "")), quote=True)}" target="_blank">{html.escape(str(r.get("title", "")))}</a>'
+            for r in row['related']
+        )
+        related_html = f'<div class="card-related"><span>🔗 Related</span>{links}</div>'
+
+    return f"""
+        <div class="sota-card">
+            <div class="card-header">
+                <span class="tech-tag">{html.escape(str(row.get('tags') or 'TECH'))}</span>
+                <div class="score-badge {score_class(score)}">{score}</div>
+            </div>
+
+            <a href="{html.escape(str(row.get('url', '')), quote=True)}" target="_blank" class="card-title">
+                {html.escape(str(row.get('title', '')))} ↗
+            </a>
+
+            <div class="card-summary">
+                {html.escape(str(row.get('summary') or ''))}
+            </div>
+
+            <div class="card-meta">
+                <span>📅 {html.escape(str(row.get('date', '')))}</span>
+                <span>•</span>
+                <span>{html.escape(str(row.get('source') or '').upper())}</span>
+                {match_html}
+            </div>
+            {related_html}
+        </div>
+        """
+
+
+def build_feed_html(rows: list, is_search: bool = False, page_size: int = 30) -> str:
+    """
+    把整个结果列表打包成一个 HTML 文档 (CSS + 数据 + 分页脚本)，
+    由 Streamlit 一次性下发，而不是每张卡片一条 st.markdown 消息。
+    """
+    cards = [render_card_html(row, is_search) for row in rows]
+    # </ 需要转义，否则摘要里出现 </script> 会提前结束脚本块
+    data = json.dumps(cards, ensure_ascii=False).replace("</", "<\\/")
+    return (
+        f"<html><head><style>{CARD_CSS}</style></head><body>"
+        f"<div id=\"feed\"></div><div id=\"sentinel\" style=\"height:1px\"></div>"
+        f"<script id=\"feed-data\" type=\"application/json\">{data}</script>"
+        f"<script>{_FEED_SCRIPT % page_size}</script>"
+        f"</body></html>"
+    )
@@ -0,0 +1,188 @@
+import os
+import re
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 给 LLM 的【项目详情】token 预算 (粗估)，替代原来的 content[:6000] + context[:4000] 盲截断
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1000"))
+# 单个段落块的上限，超长的章节按空行再切开，免得一个大章节吃掉整个预算
+MAX_CHUNK_TOKENS = int(os.getenv("CONTEXT_MAX_CHUNK_TOKENS", "250"))
+
+# 排序用的 "任务描述"：和 processor 的打分维度对齐 (技术创新、方法、效果)
+TASK_HINT = "core technical contribution, model architecture, method, training, benchmark results, performance, what is new"
+
+# 这些标题下的内容对打分没有帮助，整节丢掉。
+# 英文按词首 (\b) 匹配：不加的话 "Excitement" 里的 cite、"Elicitation" 里的 citation 也会被当成样板；
+# contribut / 贡献 只认 Contributing / 贡献指南 这类，论文 README 里的 "Key Contributions" / "主要贡献" 恰恰是最该留下的
+_BOILERPLATE_HEADINGS = re.compile(
+    r"(\btable of contents\b|\bcontents\b|\btoc\b|目录|\binstall|\bdependencies\b|安装|"
+    r"\blicen[cs]e|许可|\bcitation|\bcite\b|\bciting\b|\bbibtex\b|引用|\bcontribut(e|ing|ors?)\b|贡献指南|参与贡献|贡献者|\backnowledg|致谢|"
+    r"\bstar history\b|\bcontact\b|联系|\bsponsor|赞助|\bcommunity\b|社区|\bfaq\b)",
+    re.IGNORECASE,
+)
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+# Jina Reader 输出的是 setext 标题 (下一行是 === / ---)
+_SETEXT = re.compile(r"^\s*(=+|-+)\s*$")
+# 只有徽章/图片/空链接的行：[![build](...)](...)、![logo](...)、<img ...>、<p align="center"> 之类
+_BADGE_LINE = re.compile(r"^\s*((\[?!\[[^\]]*\]\([^)]*\)\]?(\([^)]*\))?|<img[^>]*>|</?(p|a|div|br|picture|source)[^>]*>)\s*)+$", re.IGNORECASE)
+_CODE_FENCE = re.compile(r"^\s*(```|~~~)")
+# 代码块里是这些命令就是安装步骤
+_INSTALL_CMD = re.compile(r"\b(pip3? install|conda (create|install|activate)|git clone|npm (i|install)|docker pull|cd \S+)\b")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    不依赖 tokenizer 的粗估：CJK 大约一字一 token，其余大约 4 个字符一 token
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def _strip_noise(lines: list) -> list:
+    """
+    去掉徽章行、HTML 装饰和安装命令代码块
+    """
+    kept, block, in_code = [], [], False
+    for line in lines:
+        if _CODE_FENCE.match(line):
+            if in_code:
+                block.append(line)
+                if not _INSTALL_CMD.search("\n".join(block)):
+                    kept.extend(block)
+                block, in_code = [], False
+            else:
+                block, in_code = [line], True
+            continue
+        if in_code:
+            block.append(line)
+        elif not _BADGE_LINE.match(line):
+            kept.append(line)
+    if block:  # 没闭合的代码块原样保留
+        kept.extend(block)
+    return kept
+
+
+def _is_link_list(text: str) -> bool:
+    # 目录 / 导航：正文几乎全是链接
+    body = re.sub(r"[\s\-*|#>]", "", text)
+    links = "".join(m.group(0) for m in _LINK.finditer(text))
+    return bool(body) and len(re.sub(r"[\s\-*|#>]", "", links)) / len(body) > 0.6
+
+
+def _pieces(body: str):
+    """
+    按空行切段；单段仍然超长时按句子切，单句超长再按字符切
+    """
+    for para in re.split(r"\n\s*\n", body):
+        if estimate_tokens(para) <= MAX_CHUNK_TOKENS:
+            yield para
+            continue
+        group = ""
+        for sentence in re.split(r"(?<=[.!?。！？])\s*", para):
+            if group and estimate_tokens(group + sentence) > MAX_CHUNK_TOKENS:
+                yield group
+                group = ""
+            step = MAX_CHUNK_TOKENS * (1 if _CJK.search(sentence) else 4)
+            while estimate_tokens(sentence) > MAX_CHUNK_TOKENS:
+                yield sentence[:step]
+                sentence = sentence[step:]
+            group += sentence + ("" if _CJK.search(sentence[-1:]) else " ")
+        if group.strip():
+            yield group.strip()
+
+
+def _chunk(heading: str, body: str) -> list:
+    if estimate_tokens(body) <= MAX_CHUNK_TOKENS:
+        return [f"{heading}\n{body}".strip()]
+    chunks, current = [], ""
+    for para in _pieces(body):
+        if current and estimate_tokens(current + para) > MAX_CHUNK_TOKENS:
+            chunks.append(f"{heading}\n{current}".strip())
+            current = ""
+        current += para + "\n\n"
+    if current.strip():
+        chunks.append(f"{heading}\n{current}".strip())
+    return chunks
+
+
+def split_sections(markdown: str) -> list:
+    """
+    按标题切成段落块，丢掉样板内容。返回按原文顺序排列的块。
+    代码块里的 # 不当作标题。
+    """
+    sections, heading, body, in_code = [], "", [], False
+    for line in markdown.splitlines():
+        if _CODE_FENCE.match(line):
+            in_code = not in_code
+        match = None if in_code else _HEADING.match(line)
+        if match:
+            sections.append((heading, body))
+            heading, body = line, []
+        elif not in_code and _SETEXT.match(line) and body and body[-1].strip():
+            title = body.pop().strip()
+            sections.append((heading, body))
+            heading, body = f"{'#' if line.strip()[0] == '=' else '##'} {title}", []
+        else:
+            body.append(line)
+    sections.append((heading, body))
+
+    chunks = []
+    for heading, lines in sections:
+        title = _HEADING.match(heading).group(2) if heading else ""
+        if title and _BOILERPLATE_HEADINGS.search(title):
+            continue
+        text = "\n".join(_strip_noise(lines)).strip()
+        text = re.sub(r"\n{3,}", "\n\n", text)
+        if not text or _is_link_list(text):
+            continue
+        chunks.extend(_chunk(heading, text))
+    return chunks
+
+
+def _rank(chunks: list, query: str) -> list:
+    """
+    返回块下标，按与打分任务的相关度降序。开头那块 (项目一句话介绍/元数据) 永远排第一。
+    本地模型不可用时按原文顺序。
+    """
+    order = list(range(len(chunks)))
+    try:
+        from src.embedder import get_embedder
+        vectors = np.asarray(get_embedder().generate_embeddings([query] + chunks), dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Context ranking unavailable, keeping document order: {e}")
+        return order
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    sims = vectors[1:] @ vectors[0]
+    # 轻微的位置先验：同等相关时靠前的章节更可能是概述
+    scores = sims - 0.01 * np.arange(len(chunks))
+    scores[0] = np.inf
+    return [int(i) for i in np.argsort(-scores)]
+
+
+def build_context(item: dict, content: str, budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    把爬到的 Markdown 压成预算内最相关的几块，按原文顺序拼回去
+    """
+    chunks = split_sections(content or "")
+    if not chunks:
+        return (content or "")[:budget * 4]
+    if sum(estimate_tokens(c) for c in chunks) <= budget:
+        # 去掉样板后已经够短了，不用再跑模型
+        return "\n\n".join(chunks)
+
+    query = f"{item.get('title', '')} {item.get('description', '')} {TASK_HINT}"
+    picked, used = [], 0
+    for i in _rank(chunks, query):
+        cost = estimate_tokens(chunks[i])
+        if used + cost > budget:
+            continue
+        picked.append(i)
+        used += cost
+    if not picked:
+        # 第一块本身就超预算：按字符截断
+        return chunks[0][:budget * 4]
+    return "\n\n".join(chunks[i] for i in sorted(picked))
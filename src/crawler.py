@@ -1,9 +1,13 @@
-import requests
+from src.http_client import session
+import os
 import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 只是防止异常大的页面撑爆内存；真正给 LLM 的内容由 src/context_builder.py 按相关度挑选
+CRAWL_MAX_CHARS = int(os.getenv("CRAWL_MAX_CHARS", "40000"))
+
 def scrape_content(url: str) -> str:
     """
     使用 Jina Reader 将任意 URL 转换为对 LLM 友好的 Markdown。
@@ -22,14 +26,12 @@ def scrape_content(url: str) -> str:
     
     try:
         # 设置 20秒超时，防止卡死
-        response = requests.get(jina_url, headers=headers, timeout=20)
+        response = session.get(jina_url, headers=headers, timeout=20)
         
         if response.status_code == 200:
             content = response.text
-            # 截断策略：
-            # DeepSeek V3 窗口很大，但为了响应速度，我们取前 6000 字符
-            # 这通常包含了 README 的 Header, Features, 和 Quick Start
-            return content[:6000]
+            # 不在这里盲截断：前 6000 字符经常全是徽章、目录和安装步骤
+            return content[:CRAWL_MAX_CHARS]
         else:
             logger.warning(f"Crawler failed ({response.status_code}): {url}")
             return ""
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import queue
+import random
+import signal
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.fetcher import fetch_github_trends, fetch_huggingface_trends, fetch_hackernews_ai
+from src.storage import filter_new_items
+from src.notifier import flush_outbox
+from src.github_client import github
+
+logger = logging.getLogger(__name__)
+
+# 每个数据源自己的轮询间隔 (秒)。HN 变化最快，HF 热榜最慢
+SOURCES = {
+    "github": (fetch_github_trends, float(os.getenv("POLL_GITHUB", "900"))),
+    "huggingface": (fetch_huggingface_trends, float(os.getenv("POLL_HUGGINGFACE", "1800"))),
+    "hackernews": (fetch_hackernews_ai, float(os.getenv("POLL_HACKERNEWS", "300"))),
+}
+# 间隔上下随机浮动的比例，避免几个源总在同一秒打出去
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+# 分析阶段攒批：最多等这么久 / 攒这么多条就开跑
+BATCH_WINDOW = float(os.getenv("DAEMON_BATCH_WINDOW", "30"))
+BATCH_SIZE = int(os.getenv("DAEMON_BATCH_SIZE", "20"))
+# 分析过但没入库 (低分/噪音) 的条目，多久之内不再重复分析；和每日 cron 的语义保持一致
+REANALYZE_AFTER = float(os.getenv("DAEMON_REANALYZE_AFTER", "86400"))
+HEALTH_PORT = int(os.getenv("DAEMON_HEALTH_PORT", "8080"))
+# 多久重试一次 outbox 里没送达的通知 (否则要等进程重启)
+OUTBOX_RETRY_INTERVAL = float(os.getenv("DAEMON_OUTBOX_RETRY", "600"))
+
+
+class DaemonState:
+    """
+    各线程共享的运行状态，/health 直接把它序列化出去。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.sources = {
+            name: {"interval": interval, "last_poll": None, "last_success": None,
+                   "last_error": None, "fetched": 0, "queued": 0}
+            for name, (_, interval) in SOURCES.items()
+        }
+        self.work = queue.Queue()
+        # 已在队列里或正在分析的 URL，防止两次轮询把同一条重复入队
+        self.pending_urls = set()
+        self.enqueued_at = {}
+        # 最近分析过的 URL -> 分析时间
+        self.recently_analyzed = {}
+        self.analyzed = 0
+        self.batches = 0
+        self.last_batch_at = None
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self.lock:
+            oldest = min(self.enqueued_at.values(), default=None)
+            sources = {}
+            for name, s in self.sources.items():
+                s = dict(s)
+                # 轮询滞后：距离上次成功轮询已经过去多久，超过 2 个间隔就算不健康
+                s["lag"] = round(now - s["last_success"], 1) if s["last_success"] else None
+                s["healthy"] = s["last_success"] is not None and now - s["last_success"] < 2 * s["interval"] * (1 + POLL_JITTER)
+                sources[name] = s
+            return {
+                "status": "ok" if all(s["healthy"] for s in sources.values()) else "degraded",
+                "uptime": round(now - self.started_at, 1),
+                "queue_depth": self.work.qsize(),
+                # 分析滞后：队列里最老的一条等了多久
+                "queue_lag": round(now - oldest, 1) if oldest else 0,
+                "analyzed": self.analyzed,
+                "batches": self.batches,
+                "last_batch_at": self.last_batch_at,
+                "sources": sources,
+                "github_quota": github.quota_report(),
+            }
+
+
+def _poll_loop(name: str, fetch_fn, interval: float, state: DaemonState, stop: threading.Event):
+    while not stop.is_set():
+        with state.lock:
+            state.sources[name]["last_poll"] = time.time()
+        try:
+            items = fetch_fn()
+            new_items = filter_new_items(items)
+            queued = 0
+            with state.lock:
+                now = time.time()
+                for item in new_items:
+                    if item["url"] in state.pending_urls:
+                        continue
+                    if now - state.recently_analyzed.get(item["url"], 0) < REANALYZE_AFTER:
+                        continue
+                    state.pending_urls.add(item["url"])
+                    state.enqueued_at[item["url"]] = time.time()
+                    state.work.put(item)
+                    queued += 1
+                s = state.sources[name]
+                s["last_success"] = time.time()
+                s["last_error"] = None
+                s["fetched"] += len(items)
+                s["queued"] += queued
+            if queued:
+                logger.info(f"📥 [{name}] {queued} new item(s) queued for analysis.")
+        except Exception as e:
+            logger.error(f"❌ [{name}] Poll failed: {e}")
+            with state.lock:
+                state.sources[name]["last_error"] = str(e)
+
+        stop.wait(interval * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
+
+
+def _analysis_loop(analyze_fn, state: DaemonState, stop: threading.Event):
+    last_flush = time.time()
+    while not stop.is_set():
+        if time.time() - last_flush >= OUTBOX_RETRY_INTERVAL:
+            last_flush = time.time()
+            try:
+                flush_outbox()
+            except Exception as e:
+                logger.error(f"❌ [Daemon] Outbox retry failed: {e}")
+        try:
+            batch = [state.work.get(timeout=1)]
+        except queue.Empty:
+            continue
+
+        # 攒批：一条进来后最多再等 BATCH_WINDOW 秒，让同一波更新进同一份报告
+        deadline = time.time() + BATCH_WINDOW
+        while len(batch) < BATCH_SIZE and not stop.is_set():
+            try:
+                batch.append(state.work.get(timeout=max(0.0, deadline - time.time())))
+            except queue.Empty:
+                break
+
+        logger.info(f"🧠 [Daemon] Analyzing batch of {len(batch)} item(s)...")
+        completed = False
+        try:
+            analyze_fn(batch)
+            completed = True
+        except Exception as e:
+            logger.error(f"❌ [Daemon] Analysis batch failed: {e}")
+        finally:
+            with state.lock:
+                now = time.time()
+                for item in batch:
+                    state.pending_urls.discard(item["url"])
+                    state.enqueued_at.pop(item["url"], None)
+                    # 只有拿到结论的 (LLM 打过分 / 被预打分或规则挡掉) 才进冷却期，分析失败的下一轮轮询重新入队
+                    if completed and not item.get("_analysis_failed"):
+                        state.recently_analyzed[item["url"]] = now
+                state.recently_analyzed = {
+                    url: t for url, t in state.recently_analyzed.items() if now - t < REANALYZE_AFTER
+                }
+                state.analyzed += len(batch)
+                state.batches += 1
+                state.last_batch_at = time.time()
+
+
+def _serve_health(state: DaemonState) -> ThreadingHTTPServer:
+    class HealthHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/health"):
+                self.send_error(404)
+                return
+            snapshot = state.snapshot()
+            body = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
+            self.send_response(200 if snapshot["status"] == "ok" else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", HEALTH_PORT), HealthHandler)
+    threading.Thread(target=server.serve_forever, name="health", daemon=True).start()
+    logger.info(f"🩺 Health endpoint: http://0.0.0.0:{HEALTH_PORT}/health")
+    return server
+
+
+def run_daemon(analyze_fn):
+    """
+    常驻运行：每个数据源一个轮询线程，一个分析线程消费工作队列。
+    analyze_fn(items) 就是 main.analyze_and_publish，分析/存档/推送逻辑和单次运行完全一致。
+    """
+    logger.info("🛰️ SOTA Watch Daemon Started")
+
+    # 模型只在启动时加载一次，之后每次分析都是热的
+    from src.embedder import embed_for_slots
+    embed_for_slots("warmup")
+
+    flush_outbox()
+
+    state = DaemonState()
+    stop = threading.Event()
+    server = _serve_health(state)
+
+    threads = [
+        threading.Thread(target=_poll_loop, args=(name, fn, interval, state, stop), name=f"poll-{name}", daemon=True)
+        for name, (fn, interval) in SOURCES.items()
+    ]
+    threads.append(threading.Thread(target=_analysis_loop, args=(analyze_fn, state, stop), name="analysis", daemon=True))
+    for t in threads:
+        t.start()
+
+    # Ctrl+C 和 SIGTERM (systemd / docker stop) 都走优雅退出
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while not stop.is_set():
+            stop.wait(1)
+    except KeyboardInterrupt:
+        stop.set()
+    logger.info("🛑 Shutting down daemon...")
+    server.shutdown()
+    for t in threads:
+        t.join(timeout=5)
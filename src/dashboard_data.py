@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+import logging
+from dotenv import load_dotenv
+from src.embedder import get_query_embedding, SEARCH_SLOT
+from src.search_index import BM25Index, INDEX_PATH, new_rows, is_keyword_query, rrf_fuse
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 卡片流已经是单组件 + 滚动分页，可以放心调大
+FEED_LIMIT = int(os.getenv("DASHBOARD_FEED_LIMIT", "50"))
+SEARCH_LIMIT = 20
+# 带标签/来源筛选的语义搜索：向量 RPC 不支持过滤，多取几倍再筛，免得筛完只剩几条
+FACET_OVERFETCH = int(os.getenv("DASHBOARD_FACET_OVERFETCH", "10"))
+# 本地倒排索引多久和数据库对一次账 (秒)
+INDEX_SYNC_INTERVAL = 60
+
+
+def facet_match(row: dict, tags=None, sources=None) -> bool:
+    return (not tags or row.get("tags") in tags) and (not sources or row.get("source") in sources)
+
+
+def facet_filter(rows: list, tags=None, sources=None) -> list:
+    return [row for row in rows if facet_match(row, tags, sources)]
+
+
+class DashboardData:
+    """
+    dashboard 的取数逻辑 (卡片流 + 关键词/语义/混合搜索)。不依赖 Streamlit：
+    dashboard.py 里由 st.cache_resource 持有一个实例，压测 (benchmarks/dashboard_load.py) 直接构造。
+    """
+
+    def __init__(self, store, index: BM25Index = None, index_path: str = INDEX_PATH):
+        self.store = store
+        self.index = index if index is not None else BM25Index.load(index_path)
+        # index_path=None 时只在内存里维护索引，不落盘
+        self.index_path = index_path
+        self._index_lock = threading.Lock()
+
+    def search_index(self) -> BM25Index:
+        index = self.index
+        if time.time() - index.last_sync > INDEX_SYNC_INTERVAL and self._index_lock.acquire(blocking=False):
+            try:
+                rows = new_rows(index, self.store)
+                if rows:
+                    # 其它会话可能正在 search 旧索引：在副本上更新，最后换引用
+                    index = index.copy()
+                    for row in rows:
+                        index.add(row)
+                    if self.index_path:
+                        index.save(self.index_path)
+                index.last_sync = time.time()
+                self.index = index
+            except Exception as e:
+                logger.warning(f"Search index sync failed: {e}")
+            finally:
+                self._index_lock.release()
+        return index
+
+    @staticmethod
+    def _keyword_row(index: BM25Index, doc_id) -> dict:
+        # 关键词命中没有向量相似度 (经过 DataFrame 后是 NaN，卡片那边按非有限值处理)；
+        # 返回副本，调用方往行上加字段不会改到索引里的文档
+        return {**index.docs[doc_id], "similarity": None}
+
+    def vector_search(self, query_text: str, tags=None, sources=None) -> list:
+        """
+        有筛选条件时多取 FACET_OVERFETCH 倍再在本地过滤，返回最多 SEARCH_LIMIT 条
+        """
+        query_vector = get_query_embedding(query_text)
+        count = SEARCH_LIMIT * FACET_OVERFETCH if (tags or sources) else SEARCH_LIMIT
+        rows = self.store.match_items(query_vector, match_threshold=0.25, match_count=count, slot=SEARCH_SLOT)
+        return facet_filter(rows, tags, sources)[:SEARCH_LIMIT]
+
+    def get_data(self, query_text=None, min_score=7, mode="Hybrid", tags=None, sources=None) -> tuple:
+        """
+        返回 (行列表, 是否搜索结果)
+        """
+        if not query_text:
+            # 普通模式 (标签/来源筛选在库里做，拿到的仍是最新 FEED_LIMIT 条)
+            return self.store.list_items(min_score, FEED_LIMIT, tags, sources), False
+
+        if mode == "Semantic":
+            # AI 搜索模式
+            return self.vector_search(query_text, tags, sources), True
+
+        # 关键词 / 混合模式：先查本地 BM25 (亚毫秒级，不需要加载模型)，筛选在取 top k 之前做
+        index = self.search_index()
+        accept = (lambda row: facet_match(row, tags, sources)) if (tags or sources) else None
+        keyword_hits = index.search(query_text, SEARCH_LIMIT, accept)
+        if mode == "Keyword" or (keyword_hits and is_keyword_query(query_text)):
+            return [self._keyword_row(index, doc_id) for doc_id, _ in keyword_hits], True
+
+        # 概念型查询：向量结果和关键词结果用 RRF 融合 (两边都已经按筛选条件过滤过)
+        vector_rows = self.vector_search(query_text, tags, sources)
+        rows = {row["id"]: row for row in vector_rows}
+        for doc_id, _ in keyword_hits:
+            rows.setdefault(doc_id, self._keyword_row(index, doc_id))
+        fused = rrf_fuse([[row["id"] for row in vector_rows], [doc_id for doc_id, _ in keyword_hits]])
+        return [rows[doc_id] for doc_id, _ in fused[:SEARCH_LIMIT]], True
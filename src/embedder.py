@@ -1,40 +1,120 @@
+import os
 import logging
-from sentence_transformers import SentenceTransformer
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 向量槽位 -> 模型。格式 "模型名" 或 "模型名@revision"，这个字符串原样记录到每行的 *_model 列。
+# 换模型不停机：
+#   1. 设置 EMBEDDING_MODEL_NEXT，新写入的行两个槽位都会填
+#   2. 后台跑 `python backfill_vectors.py --slot embedding_next` 慢慢迁移历史行
+#   3. 迁移完成后设置 SEARCH_EMBEDDING_SLOT=embedding_next，搜索切到新模型
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_SLOTS = {
+    "embedding": os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL),
+    "embedding_next": os.getenv("EMBEDDING_MODEL_NEXT") or None,
+}
+# 搜索用哪个槽位 (查询向量也用该槽位的模型生成)
+SEARCH_SLOT = os.getenv("SEARCH_EMBEDDING_SLOT", "embedding")
+
+# 推理参数，推荐值用 benchmarks/embed_bench.py 在目标机器上测出来
+# EMBED_THREADS: torch 计算线程数 (不设则用 torch 默认 = 物理核数，会和 Streamlit 的线程抢 CPU)
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0")) or None
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+# 截断长度 (token)；MiniLM 默认 256，标题+摘要通常 128 就够
+EMBED_MAX_SEQ_LENGTH = int(os.getenv("EMBED_MAX_SEQ_LENGTH", "0")) or None
+EMBED_DEVICE = os.getenv("EMBED_DEVICE") or None
+# fp32 | bf16 | fp16 | int8 (int8 = Linear 层动态量化，仅 CPU)
+EMBED_PRECISION = os.getenv("EMBED_PRECISION", "fp32")
+
+
+def _apply_precision(model, precision: str):
+    import torch
+
+    if precision == "bf16":
+        return model.to(torch.bfloat16)
+    if precision == "fp16":
+        return model.half()
+    if precision == "int8":
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if precision != "fp32":
+        raise ValueError(f"Unknown EMBED_PRECISION: {precision}")
+    return model
+
+
 class LocalEmbedder:
-    def __init__(self):
-        logger.info("🧠 Loading Embedding Model (all-MiniLM-L6-v2)...")
-        # 这是一个非常轻量级的模型，只有 80MB，跑在 CPU 上也很快
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, model_spec: str = DEFAULT_MODEL, threads: int = EMBED_THREADS,
+                 batch_size: int = EMBED_BATCH_SIZE, max_seq_length: int = EMBED_MAX_SEQ_LENGTH,
+                 device: str = EMBED_DEVICE, precision: str = EMBED_PRECISION):
+        # 延迟导入：只做关键词搜索/不生成向量的进程不用付 torch 的启动成本
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model_spec = model_spec
+        self.batch_size = batch_size
+        name, _, revision = model_spec.partition("@")
+        logger.info(f"🧠 Loading Embedding Model ({model_spec}, {precision}, threads={torch.get_num_threads()})...")
+        # 默认的 all-MiniLM-L6-v2 非常轻量级，只有 80MB，跑在 CPU 上也很快
+        self.model = SentenceTransformer(name, revision=revision or None, device=device)
+        if max_seq_length:
+            self.model.max_seq_length = max_seq_length
+        self.model = _apply_precision(self.model, precision)
+        self.dim = self.model.get_sentence_embedding_dimension()
 
     def generate_embedding(self, text: str) -> list:
         """
-        将文本转换为 384 维向量
+        将文本转换为向量 (维度取决于模型，MiniLM 为 384)
         """
         if not text:
-            return [0.0] * 384
-            
+            return [0.0] * self.dim
+
         # 生成向量
         embedding = self.model.encode(text)
-        # 转换为列表返回
-        return embedding.tolist()
+        # 转换为列表返回 (半精度模型的输出统一转回 float32)
+        return embedding.astype("float32").tolist()
+
+    def generate_embeddings(self, texts: list) -> list:
+        """
+        批量版本，回填/迁移时用，比逐条 encode 快得多
+        """
+        vectors = self.model.encode([t or "" for t in texts], batch_size=self.batch_size).astype("float32")
+        return [v.tolist() if t else [0.0] * self.dim for t, v in zip(texts, vectors)]
+
+# 单例模式，避免重复加载模型 (每个模型一个实例)
+_embedder_instances = {}
+
+def get_embedder(model_spec: str = None) -> LocalEmbedder:
+    model_spec = model_spec or EMBEDDING_SLOTS["embedding"]
+    if model_spec not in _embedder_instances:
+        _embedder_instances[model_spec] = LocalEmbedder(model_spec)
+    return _embedder_instances[model_spec]
+
+def get_embedding(text: str, model_spec: str = None):
+    return get_embedder(model_spec).generate_embedding(text)
 
-# 单例模式，避免重复加载模型
-_embedder_instance = None
+def get_query_embedding(text: str):
+    """
+    搜索用的查询向量：必须和被搜索槽位里的向量出自同一个模型
+    """
+    return get_embedding(text, EMBEDDING_SLOTS[SEARCH_SLOT])
 
-def get_embedding(text: str):
-    global _embedder_instance
-    if _embedder_instance is None:
-        _embedder_instance = LocalEmbedder()
-    return _embedder_instance.generate_embedding(text)
+def embed_for_slots(text: str) -> dict:
+    """
+    为所有已配置的槽位生成向量，返回可以直接写进 sota_items 的列
+    """
+    columns = {}
+    for slot, model_spec in EMBEDDING_SLOTS.items():
+        if model_spec:
+            columns[slot] = get_embedding(text, model_spec)
+            columns[f"{slot}_model"] = model_spec
+    return columns
 
 if __name__ == "__main__":
     # 测试代码
     vec = get_embedding("Hello AI World")
     print(f"✅ Generated vector with dimension: {len(vec)}")
     print(f"Sample: {vec[:5]}...")
-    
\ No newline at end of file
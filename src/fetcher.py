@@ -1,6 +1,8 @@
 import os
 import json
-import requests
+import codecs
+from src.http_client import session
+from src.github_client import github
 import re
 import sys
 from datetime import datetime
@@ -8,15 +10,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-# 读取 Token，如果没有则为 None
-GITHUB_TOKEN = os.getenv("GH_TOKEN")
+# 读取 Token，如果没有则为 None (GitHub token 由 src/github_client.py 管理)
 HF_TOKEN = os.getenv("HF_TOKEN")
 
 # 构造请求头
-GH_HEADERS = {"Accept": "application/vnd.github.v3+json"}
-if GITHUB_TOKEN:
-    GH_HEADERS["Authorization"] = f"token {GITHUB_TOKEN}"
-
 HF_HEADERS = {"Authorization": f"Bearer {HF_TOKEN}"} if HF_TOKEN else {}
 
 NOISE_PATTERNS = [
@@ -29,6 +26,10 @@ def is_noise(text: str) -> bool:
     combined_pattern = "|".join(NOISE_PATTERNS)
     return bool(re.search(combined_pattern, text, re.IGNORECASE))
 
+# 搜索条件和页数可配置；翻页由 GitHubClient 按 search 配额调度
+GH_SEARCH_QUERY = os.getenv("GH_SEARCH_QUERY", "AI topic:ai")
+GH_SEARCH_PAGES = int(os.getenv("GH_SEARCH_PAGES", "1"))
+
 def fetch_github_trends():
     print("🔄 Fetching GitHub Data...")
     
@@ -36,22 +37,8 @@ def fetch_github_trends():
     # 简化查询逻辑，避免 422 语法错误
     # q: "AI topic:ai" -> 搜索包含 "AI" 关键词且打了 "ai" 标签的项目
     # 这样绝对符合语法，不会报错
-    params = {
-        "q": "AI topic:ai", 
-        "sort": "created",
-        "order": "desc",
-        "per_page": 20
-    }
-    
     try:
-        response = requests.get("https://api.github.com/search/repositories", headers=GH_HEADERS, params=params, timeout=10)
-        
-        if response.status_code != 200:
-            print(f"❌ GitHub API Error: Status {response.status_code}")
-            print(f"   Reason: {response.text}")
-            return []
-            
-        items = response.json().get("items", [])
+        items = github.search_repositories(GH_SEARCH_QUERY, sort="created", order="desc", per_page=20, max_pages=GH_SEARCH_PAGES)
         
         results = []
         for item in items:
@@ -68,40 +55,100 @@ def fetch_github_trends():
         print(f"✅ GitHub: Found {len(results)} items.")
         return results
     except Exception as e:
-        print(f"❌ GitHub Connection Error: {e}")
+        print(f"❌ GitHub API Error: {e}")
         return []
+    finally:
+        github.log_quota()
+        github.save_etags()
+
+# HF 只取我们真正用到的字段 (expand[] 投影)，不再 full=true 把 siblings/cardData/config 全拉下来
+HF_FIELDS = ["likes", "pipeline_tag", "lastModified"]
+HF_PAGE_SIZE = int(os.getenv("HF_PAGE_SIZE", "50"))
+HF_MAX_ITEMS = int(os.getenv("HF_MAX_ITEMS", "50"))
+
+def iter_json_array(response, counter: dict):
+    """
+    流式解析顶层 JSON 数组：边下载边逐个吐出元素，不把整个响应体读进内存再 json.loads。
+    counter["bytes"] 累加解压后的 JSON 字节数，counter["wire_bytes"] 累加网络上实际收到的字节数
+    (gzip 时两者不同；后者取自 urllib3 的 response.raw.tell())。
+    """
+    decoder = json.JSONDecoder()
+    # 增量解码：多字节 UTF-8 字符被 chunk 切断时不会丢字
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    started = False
+    raw = getattr(response, "raw", None)
+    wire_pos = raw.tell() if hasattr(raw, "tell") else 0
+    for chunk in response.iter_content(chunk_size=16384):
+        counter["bytes"] += len(chunk)
+        if hasattr(raw, "tell"):
+            counter["wire_bytes"] = counter.get("wire_bytes", 0) + raw.tell() - wire_pos
+            wire_pos = raw.tell()
+        buffer += utf8.decode(chunk)
+        pos = 0
+        while True:
+            # 跳过空白、数组开头的 [ 和元素之间的逗号
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if not started and pos < len(buffer) and buffer[pos] == "[":
+                started = True
+                pos += 1
+                continue
+            if pos >= len(buffer) or buffer[pos] == "]":
+                break
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # 当前元素还没下载完整，等下一个 chunk
+                break
+            yield obj
+            pos = end
+        buffer = buffer[pos:]
 
 def fetch_huggingface_trends():
     print("🔄 Fetching HF Data...")
-    url = "https://huggingface.co/api/models?sort=likes&direction=-1&limit=20&full=true"
+    url = "https://huggingface.co/api/models"
+    params = [("sort", "likes"), ("direction", "-1"), ("limit", min(HF_PAGE_SIZE, HF_MAX_ITEMS))]
+    params += [("expand[]", field) for field in HF_FIELDS]
+    counter = {"bytes": 0, "wire_bytes": 0}
+    results = []
     try:
-        response = requests.get(url, headers=HF_HEADERS, timeout=10)
-        if response.status_code != 200:
-            print(f"⚠️ HF API Error: {response.status_code}")
-            return []
-            
-        models = response.json()
-        results = []
-        for model in models:
-            if not model.get("lastModified"): continue
-            desc = f"❤️ {model.get('likes', 0)} | Task: {model.get('pipeline_tag', 'Unknown')}"
-            results.append({
-                "source": "huggingface",
-                "title": model["modelId"],
-                "url": f"https://huggingface.co/{model['modelId']}",
-                "description": desc,
-                "publish_date": model["lastModified"]
-            })
-        print(f"✅ HF: Found {len(results)} items.")
+        # 按 Link: <...>; rel="next" 游标翻页，直到拿够 HF_MAX_ITEMS
+        while url and len(results) < HF_MAX_ITEMS:
+            with session.get(url, headers=HF_HEADERS, params=params, timeout=10, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"⚠️ HF API Error: {response.status_code}")
+                    break
+
+                for model in iter_json_array(response, counter):
+                    model_id = model.get("modelId") or model.get("id")
+                    if not model_id or not model.get("lastModified"): continue
+                    desc = f"❤️ {model.get('likes', 0)} | Task: {model.get('pipeline_tag', 'Unknown')}"
+                    results.append({
+                        "source": "huggingface",
+                        "title": model_id,
+                        "url": f"https://huggingface.co/{model_id}",
+                        "description": desc,
+                        "publish_date": model["lastModified"]
+                    })
+                    if len(results) >= HF_MAX_ITEMS:
+                        break
+
+                # 下一页的 URL 已经带好了所有参数
+                url = response.links.get("next", {}).get("url")
+                params = None
+
+        print(f"✅ HF: Found {len(results)} items. (payload {counter['bytes'] / 1024:.1f} KB, "
+              f"{counter['wire_bytes'] / 1024:.1f} KB on the wire)")
         return results
     except Exception as e:
         print(f"❌ HF Error: {e}")
-        return []
+        return results
 
 def fetch_hackernews_ai():
     print("🔄 Fetching HN Data (Top 15)...", end="")
     try:
-        ids_resp = requests.get("https://hacker-news.firebaseio.com/v0/topstories.json", timeout=5)
+        ids_resp = session.get("https://hacker-news.firebaseio.com/v0/topstories.json", timeout=5)
         if ids_resp.status_code != 200:
              print("\n❌ HN API Error")
              return []
@@ -111,7 +158,7 @@ def fetch_hackernews_ai():
         for item_id in ids:
             print(".", end="", flush=True)
             try:
-                item_resp = requests.get(f"https://hacker-news.firebaseio.com/v0/item/{item_id}.json", timeout=3)
+                item_resp = session.get(f"https://hacker-news.firebaseio.com/v0/item/{item_id}.json", timeout=3)
                 if item_resp.status_code != 200: continue
                 item = item_resp.json()
                 if not item or "title" not in item: continue
@@ -0,0 +1,208 @@
+import os
+import json
+import time
+import threading
+import logging
+from dotenv import load_dotenv
+from src.http_client import session
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+API_ROOT = "https://api.github.com"
+# 多个 token 用逗号分隔 (GH_TOKENS)，没有就退回单个 GH_TOKEN，再没有就匿名
+GH_TOKENS = [t.strip() for t in (os.getenv("GH_TOKENS") or os.getenv("GH_TOKEN") or "").split(",") if t.strip()]
+# 配额耗尽时，如果最近的重置时间在这个秒数内就等一等，否则直接放弃本次请求
+GH_MAX_WAIT = float(os.getenv("GH_MAX_WAIT", "65"))
+# ETag 缓存落盘，cron 每次冷启动也能发条件请求 (304 不计入配额)
+ETAG_CACHE_PATH = os.getenv("GH_ETAG_CACHE", ".sota_cache/github_etags.json")
+ETAG_CACHE_MAX = 500
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class _TokenState:
+    def __init__(self, token):
+        self.token = token
+        # resource (core/search/graphql) -> {"remaining": int, "limit": int, "reset": epoch}
+        self.quota = {}
+        self.requests = 0
+        self.not_modified = 0
+
+    @property
+    def label(self) -> str:
+        return f"{self.token[:8]}…" if self.token else "anonymous"
+
+    def available(self, resource: str, now: float) -> bool:
+        q = self.quota.get(resource)
+        # 还没见过这个 resource 的响应头：先当作可用
+        return q is None or q["remaining"] > 0 or now >= q["reset"]
+
+    def remaining(self, resource: str) -> float:
+        q = self.quota.get(resource)
+        return float("inf") if q is None else q["remaining"]
+
+
+class GitHubClient:
+    """
+    带配额感知的 GitHub 客户端：
+      - 从 X-RateLimit-* 响应头跟踪每个 token 每类资源的剩余配额
+      - 在 token 池里挑剩余最多的那个，用完自动轮换
+      - GET 请求带 If-None-Match，304 直接返回缓存内容
+    """
+
+    def __init__(self, tokens: list = None):
+        tokens = tokens if tokens is not None else GH_TOKENS
+        self.pool = [_TokenState(t) for t in tokens] or [_TokenState(None)]
+        self.lock = threading.Lock()
+        self.etags = self._load_etags()
+
+    # --- ETag 缓存 ---
+
+    def _load_etags(self) -> dict:
+        try:
+            with open(ETAG_CACHE_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save_etags(self):
+        try:
+            os.makedirs(os.path.dirname(ETAG_CACHE_PATH) or ".", exist_ok=True)
+            with self.lock:
+                # 只保留最近的一部分，防止无限增长
+                entries = sorted(self.etags.items(), key=lambda kv: kv[1]["at"])[-ETAG_CACHE_MAX:]
+                data = dict(entries)
+            with open(ETAG_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"Failed to persist GitHub ETag cache: {e}")
+
+    # --- 配额调度 ---
+
+    def _acquire(self, resource: str) -> _TokenState:
+        while True:
+            with self.lock:
+                now = time.time()
+                candidates = [t for t in self.pool if t.available(resource, now)]
+                if candidates:
+                    return max(candidates, key=lambda t: t.remaining(resource))
+                wait = min(t.quota[resource]["reset"] for t in self.pool) - now + 1
+            if wait > GH_MAX_WAIT:
+                raise RateLimitExceeded(f"GitHub {resource} quota exhausted for all tokens, resets in {wait:.0f}s")
+            logger.info(f"⏳ GitHub {resource} quota exhausted, waiting {wait:.0f}s for reset...")
+            time.sleep(max(wait, 0))
+
+    def _record(self, state: _TokenState, resource: str, response):
+        headers = response.headers
+        with self.lock:
+            state.requests += 1
+            if "X-RateLimit-Remaining" in headers:
+                resource = headers.get("X-RateLimit-Resource", resource)
+                state.quota[resource] = {
+                    "remaining": int(headers["X-RateLimit-Remaining"]),
+                    "limit": int(headers.get("X-RateLimit-Limit", 0)),
+                    "reset": float(headers.get("X-RateLimit-Reset", time.time() + 60)),
+                }
+            # 二级限流 (secondary rate limit) 只给 Retry-After
+            if response.status_code in (403, 429) and "Retry-After" in headers:
+                state.quota[resource] = {
+                    "remaining": 0,
+                    "limit": state.quota.get(resource, {}).get("limit", 0),
+                    "reset": time.time() + float(headers["Retry-After"]),
+                }
+
+    def request(self, method: str, url: str, resource: str = "core", params=None, json_body=None, timeout: float = 10):
+        """
+        发请求并返回 requests.Response。被限流时换 token 重试；GET 命中 304 时
+        返回的 response.json() 是缓存内容 (response.from_cache = True)。
+        """
+        if not url.startswith("http"):
+            url = API_ROOT + url
+        cache_key = f"{url}?{json.dumps(params, sort_keys=True)}" if method == "GET" else None
+
+        for _ in range(len(self.pool) + 1):
+            state = self._acquire(resource)
+            headers = {"Accept": "application/vnd.github.v3+json"}
+            if state.token:
+                headers["Authorization"] = f"token {state.token}"
+            cached = self.etags.get(cache_key) if cache_key else None
+            if cached:
+                headers["If-None-Match"] = cached["etag"]
+
+            response = session.request(method, url, headers=headers, params=params, json=json_body, timeout=timeout)
+            self._record(state, resource, response)
+
+            if response.status_code == 304 and cached:
+                with self.lock:
+                    state.not_modified += 1
+                    cached["at"] = time.time()
+                response.status_code = 200
+                response._content = json.dumps(cached["body"]).encode("utf-8")
+                response.from_cache = True
+                return response
+
+            # 配额用尽：这个 token 已被标记，换下一个
+            if response.status_code in (403, 429) and not state.available(resource, time.time()):
+                continue
+
+            response.from_cache = False
+            if cache_key and response.status_code == 200 and response.headers.get("ETag"):
+                with self.lock:
+                    self.etags[cache_key] = {"etag": response.headers["ETag"], "body": response.json(), "at": time.time()}
+            return response
+
+        raise RateLimitExceeded(f"GitHub {resource} quota exhausted for all tokens")
+
+    def search_repositories(self, query: str, sort: str = "created", order: str = "desc",
+                            per_page: int = 20, max_pages: int = 1) -> list:
+        """
+        分页搜索。每一页之前都先确认 search 配额 (30 次/分钟/token)，
+        配额不够且短时间内不会重置时就停在已经拿到的页。
+        """
+        items = []
+        for page in range(1, max_pages + 1):
+            try:
+                response = self.request(
+                    "GET", "/search/repositories", resource="search",
+                    params={"q": query, "sort": sort, "order": order, "per_page": per_page, "page": page}
+                )
+            except RateLimitExceeded as e:
+                logger.warning(f"{e}; stopping at page {page - 1}.")
+                break
+            if response.status_code != 200:
+                raise RuntimeError(f"Status {response.status_code}: {response.text[:300]}")
+            page_items = response.json().get("items", [])
+            items.extend(page_items)
+            if len(page_items) < per_page:
+                break
+        return items
+
+    def quota_report(self) -> list:
+        """
+        每个 token 的配额指标，用于日志 / 健康检查
+        """
+        with self.lock:
+            return [
+                {
+                    "token": t.label,
+                    "requests": t.requests,
+                    "not_modified": t.not_modified,
+                    "quota": {
+                        r: {"remaining": q["remaining"], "limit": q["limit"], "reset_in": max(0, round(q["reset"] - time.time()))}
+                        for r, q in t.quota.items()
+                    },
+                }
+                for t in self.pool
+            ]
+
+    def log_quota(self):
+        for entry in self.quota_report():
+            quota = ", ".join(f"{r} {q['remaining']}/{q['limit']} (reset {q['reset_in']}s)" for r, q in entry["quota"].items())
+            print(f"   📊 [GitHub {entry['token']}] {entry['requests']} req, {entry['not_modified']} × 304 | {quota or 'no quota data'}")
+
+
+# 全进程共享一个客户端，配额状态在 daemon 模式下跨轮询保留
+github = GitHubClient()
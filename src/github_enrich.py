@@ -0,0 +1,123 @@
+import os
+import re
+import logging
+from dotenv import load_dotenv
+from src.github_client import github, GH_TOKENS
+from src.crawler import CRAWL_MAX_CHARS
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 每个 GraphQL 请求里塞多少个仓库 (别名批量查询)，README 文本比较大，20 个一批比较稳
+BATCH_SIZE = int(os.getenv("GH_GRAPHQL_BATCH", "20"))
+# 和 crawler 的上限保持一致，实际送给 LLM 的部分由 context_builder 挑选
+README_MAX_CHARS = CRAWL_MAX_CHARS
+
+# README 文件名大小写/格式各不相同，几个常见的都查一下，取第一个存在的
+_NAME_RE = re.compile(r"[A-Za-z0-9_.\-]+")
+
+_README_PATHS = ["README.md", "readme.md", "Readme.md", "README.rst", "README"]
+
+_REPO_FIELDS = """
+    nameWithOwner
+    description
+    stargazerCount
+    forkCount
+    pushedAt
+    primaryLanguage { name }
+    languages(first: 5, orderBy: {field: SIZE, direction: DESC}) { nodes { name } }
+    repositoryTopics(first: 10) { nodes { topic { name } } }
+    latestRelease { tagName name publishedAt }
+""" + "\n".join(
+    f'    readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}'
+    for i, path in enumerate(_README_PATHS)
+)
+
+
+def _repo_slug(item: dict):
+    """
+    https://github.com/owner/name -> (owner, name)
+    """
+    parts = item.get("url", "").rstrip("/").split("/")
+    if len(parts) >= 5 and parts[2] == "github.com":
+        owner, name = parts[3], parts[4]
+        # 名字会直接拼进 GraphQL 查询，只接受 GitHub 合法字符
+        if _NAME_RE.fullmatch(owner) and _NAME_RE.fullmatch(name):
+            return owner, name
+    return None
+
+
+def _build_query(slugs: list) -> str:
+    blocks = [
+        f'  r{i}: repository(owner: "{owner}", name: "{name}") {{{_REPO_FIELDS}  }}'
+        for i, (owner, name) in enumerate(slugs)
+    ]
+    return "query {\n" + "\n".join(blocks) + "\n}"
+
+
+def _format_context(repo: dict) -> str:
+    """
+    把仓库元数据 + README 拼成给 LLM 的 Markdown 上下文
+    """
+    topics = [n["topic"]["name"] for n in (repo.get("repositoryTopics") or {}).get("nodes", [])]
+    languages = [n["name"] for n in (repo.get("languages") or {}).get("nodes", [])]
+    release = repo.get("latestRelease")
+    readme = next(
+        (repo[f"readme{i}"]["text"] for i in range(len(_README_PATHS))
+         if repo.get(f"readme{i}") and repo[f"readme{i}"].get("text")),
+        ""
+    )
+
+    lines = [
+        f"# {repo['nameWithOwner']}",
+        f"- Description: {repo.get('description') or ''}",
+        f"- Stars: {repo.get('stargazerCount', 0)} | Forks: {repo.get('forkCount', 0)} | Last push: {repo.get('pushedAt')}",
+        f"- Languages: {', '.join(languages) or 'Unknown'}",
+        f"- Topics: {', '.join(topics) or 'None'}",
+    ]
+    if release:
+        lines.append(f"- Latest release: {release.get('tagName')} ({release.get('publishedAt')})")
+    header = "\n".join(lines) + "\n\n"
+    return (header + readme)[:README_MAX_CHARS]
+
+
+def enrich_github_items(items: list) -> int:
+    """
+    批量拉取 GitHub 候选项目的 README / topics / languages / stars / latest release，
+    结果写入 item["context"]，processor 会优先使用它，Jina 只作为兜底。
+    返回成功补充上下文的条数。
+    """
+    if not GH_TOKENS:
+        # GraphQL API 必须带 token
+        return 0
+
+    targets = [(item, _repo_slug(item)) for item in items if item.get("source") == "github" and not item.get("context")]
+    targets = [(item, slug) for item, slug in targets if slug]
+
+    enriched = 0
+    for start in range(0, len(targets), BATCH_SIZE):
+        batch = targets[start:start + BATCH_SIZE]
+        try:
+            response = github.request(
+                "POST", "/graphql", resource="graphql",
+                json_body={"query": _build_query([slug for _, slug in batch])},
+                timeout=20
+            )
+            if response.status_code != 200:
+                logger.warning(f"GitHub GraphQL error {response.status_code}: {response.text[:200]}")
+                continue
+            # 部分仓库不存在/无权限时 data 里对应别名为 null，errors 里有说明，其余照常使用
+            data = response.json().get("data") or {}
+        except Exception as e:
+            logger.warning(f"GitHub GraphQL request failed: {e}")
+            continue
+
+        for i, (item, _) in enumerate(batch):
+            repo = data.get(f"r{i}")
+            if repo:
+                item["context"] = _format_context(repo)
+                enriched += 1
+
+    if targets:
+        print(f"📚 [GitHub] Enriched {enriched}/{len(targets)} repos via GraphQL ({(len(targets) + BATCH_SIZE - 1) // BATCH_SIZE} request(s)).")
+    return enriched
@@ -0,0 +1,18 @@
+import requests
+from requests.adapters import HTTPAdapter
+from src.profiling import instrument_session
+
+# 全进程共享一个 Session：TCP/TLS 连接复用，daemon 模式下连接池一直是热的
+POOL_SIZE = 16
+
+
+def _build_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    # SOTA_PROFILE 打开时记录每个请求的 host / 状态码 / 耗时，关闭时什么都不挂
+    return instrument_session(s)
+
+
+session = _build_session()
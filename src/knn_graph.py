@@ -0,0 +1,154 @@
+import os
+import logging
+from collections import Counter
+import numpy as np
+from src.embedder import SEARCH_SLOT
+
+logger = logging.getLogger(__name__)
+
+# 每个条目保留的邻居数，以及成为邻居的最低余弦相似度
+KNN_K = int(os.getenv("KNN_K", "10"))
+KNN_MIN_SIMILARITY = float(os.getenv("KNN_MIN_SIMILARITY", "0.35"))
+# 报告里的主题聚类：两条同日条目互为邻居、或共享邻居时归为一类
+CLUSTER_MIN_SIMILARITY = float(os.getenv("CLUSTER_MIN_SIMILARITY", "0.5"))
+
+
+def _merge(edges: list, new_edge: tuple, k: int = KNN_K) -> tuple:
+    """
+    把一条新边并入已有的 top-k 出边，返回 (新的边列表, 是否有变化)
+    """
+    neighbor_id, sim = new_edge
+    if any(n == neighbor_id for n, _ in edges):
+        return edges, False
+    if len(edges) >= k and sim <= edges[-1][1]:
+        return edges, False
+    merged = sorted(edges + [new_edge], key=lambda e: e[1], reverse=True)[:k]
+    return merged, True
+
+
+def update_graph(store, new_items: list) -> int:
+    """
+    增量更新：只为新条目查一次 top-k (走已有的向量检索)，再把反向边并入受影响的老条目。
+    new_items: [{"id": ..., "<slot>": vector}, ...]，返回写入的邻居列表数。
+    """
+    written = 0
+    for item in new_items:
+        vector = item.get(SEARCH_SLOT)
+        if item.get("id") is None or not vector:
+            continue
+
+        hits = store.match_items(vector, match_threshold=KNN_MIN_SIMILARITY, match_count=KNN_K + 1, slot=SEARCH_SLOT)
+        edges = [(h["id"], float(h["similarity"])) for h in hits if h["id"] != item["id"]][:KNN_K]
+        store.replace_neighbors(item["id"], edges)
+        written += 1
+
+        # 反向边：新条目可能挤进老条目的 top-k
+        current = store.neighbors([n for n, _ in edges])
+        for neighbor_id, sim in edges:
+            merged, changed = _merge(current.get(neighbor_id, []), (item["id"], sim))
+            if changed:
+                store.replace_neighbors(neighbor_id, merged)
+                written += 1
+    return written
+
+
+def rebuild_graph(store, batch_size: int = 512) -> int:
+    """
+    全量重建 (首次上线或换模型后用一次)：全部向量载入内存，分块矩阵乘求 top-k
+    """
+    ids, vectors = [], []
+    after = 0
+    while True:
+        rows = store.rows_after(after, 1000, f"id,{SEARCH_SLOT}")
+        for row in rows:
+            if row.get(SEARCH_SLOT):
+                ids.append(row["id"])
+                vectors.append(row[SEARCH_SLOT])
+        if len(rows) < 1000:
+            break
+        after = rows[-1]["id"]
+    if not ids:
+        return 0
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    k = min(KNN_K, len(ids) - 1)
+    for start in range(0, len(ids), batch_size):
+        sims = matrix[start:start + batch_size] @ matrix.T
+        for row_idx, row in enumerate(sims):
+            row[start + row_idx] = -1.0  # 排除自己
+            top = np.argpartition(-row, k)[:k] if k > 0 else []
+            edges = sorted(
+                ((ids[j], float(row[j])) for j in top if row[j] >= KNN_MIN_SIMILARITY),
+                key=lambda e: e[1], reverse=True
+            )
+            store.replace_neighbors(ids[start + row_idx], edges)
+    print(f"🕸️ [kNN] Rebuilt neighbor graph for {len(ids)} items (k={KNN_K}).")
+    return len(ids)
+
+
+def related_items(store, item_ids: list, per_item: int = 3) -> dict:
+    """
+    {item_id: [相关条目行, ...]}，一次查邻居 + 一次查行，dashboard 直接用
+    """
+    graph = store.neighbors(item_ids)
+    wanted = {n for edges in graph.values() for n, _ in edges[:per_item]}
+    rows = {r["id"]: r for r in store.rows_by_ids(sorted(wanted), "id,title,url,score")}
+    return {
+        item_id: [dict(rows[n], similarity=sim) for n, sim in edges[:per_item] if n in rows]
+        for item_id, edges in graph.items()
+    }
+
+
+def topic_clusters(store, items: list) -> list:
+    """
+    把同一批条目按 kNN 图聚成主题：互为近邻，或者共享一个足够近的邻居，就连一条边，取连通分量。
+    items 需要带 id；返回 [[item, ...], ...]，按簇大小降序，只保留 >= 2 的簇。
+    """
+    by_id = {item["id"]: item for item in items if item.get("id") is not None}
+    if len(by_id) < 2:
+        return []
+    graph = store.neighbors(list(by_id))
+    near = {
+        item_id: {n for n, sim in edges if sim >= CLUSTER_MIN_SIMILARITY} | {item_id}
+        for item_id, edges in graph.items()
+    }
+
+    parent = {i: i for i in by_id}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    ids = list(by_id)
+    for i, a in enumerate(ids):
+        for b in ids[i + 1:]:
+            if near.get(a, {a}) & near.get(b, {b}):
+                parent[find(a)] = find(b)
+
+    groups = {}
+    for item_id in ids:
+        groups.setdefault(find(item_id), []).append(by_id[item_id])
+    return sorted((g for g in groups.values() if len(g) >= 2), key=len, reverse=True)
+
+
+def format_clusters(clusters: list) -> str:
+    """
+    报告末尾的 "主题聚类" 段落
+    """
+    if not clusters:
+        return ""
+    text = "\n## 🧭 今日主题聚类\n\n"
+    for group in clusters:
+        tag = Counter(item.get("tag") or item.get("tags") or "AI" for item in group).most_common(1)[0][0]
+        titles = "、".join(item["title"] for item in group)
+        text += f"- **[{tag}]** {len(group)} 个相关项目: {titles}\n"
+    return text
+
+
+if __name__ == "__main__":
+    # 首次上线/换模型后全量重建：python -m src.knn_graph
+    from src.stores import create_store
+    rebuild_graph(create_store())
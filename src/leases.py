@@ -0,0 +1,63 @@
+import os
+import uuid
+import socket
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 手动触发的 workflow 可能和 cron 重叠：两边抓到同一批条目，各自爬取、打分，最后一边插入时撞唯一索引。
+# 分析前先按 URL 抢租约，抢到的才处理；租约过期 (worker 挂了) 后别人可以接手。
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+# 要盖住一整次分析 (每条几秒到十几秒)；被拒的条目不主动释放，租约到期前别的运行不会重复分析它们
+LEASE_TTL = float(os.getenv("LEASE_TTL", "3600"))
+# 把分析阶段拆到多个 runner 上：SHARD_COUNT=3 时三个 runner 分别设 SHARD_INDEX=0/1/2
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+
+
+def in_shard(url: str, index: int = SHARD_INDEX, count: int = SHARD_COUNT) -> bool:
+    # 不能用内置 hash()：每个进程的字符串 hash 种子不同
+    if count <= 1:
+        return True
+    digest = hashlib.md5(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index
+
+
+def claim_items(store, items: list, ttl: float = LEASE_TTL) -> list:
+    """
+    返回本 worker 负责的条目：属于本分片、抢到了租约、且还没有被别的运行写入库里。
+    最后一步是必要的：对方可能在我们 filter_new_items 之后、抢租约之前刚好处理完并入库。
+    存储不可用时退化为不加锁 (和以前的行为一致)，不阻塞 pipeline。
+    """
+    mine = [item for item in items if in_shard(item["url"])]
+    if len(mine) < len(items):
+        print(f"🧩 [Lease] Shard {SHARD_INDEX}/{SHARD_COUNT}: {len(mine)} of {len(items)} items.")
+    if not mine:
+        return []
+
+    try:
+        claimed = store.claim_urls([item["url"] for item in mine], WORKER_ID, ttl)
+        saved = store.existing_urls(sorted(claimed))
+    except Exception as e:
+        logger.warning(f"Lease claim failed, processing without leases: {e}")
+        return mine
+
+    if saved:
+        store.release_urls(sorted(saved), WORKER_ID)
+    result = [item for item in mine if item["url"] in claimed and item["url"] not in saved]
+    busy = len(mine) - len(claimed)
+    if busy or saved:
+        print(f"🔒 [Lease] {busy} item(s) held by other workers, {len(saved)} already saved; processing {len(result)}.")
+    return result
+
+
+def release_items(store, items: list):
+    """
+    归还租约：分析失败 (异常或 LLM 没给出结论) 时让下一次运行 (或别的 runner) 立刻可以接手；
+    入库成功后也要还，之后靠 existing_urls 去重，租约行留着只会让表越来越大。
+    """
+    try:
+        store.release_urls([item["url"] for item in items], WORKER_ID)
+    except Exception as e:
+        logger.warning(f"Lease release failed (leases will expire in {LEASE_TTL:.0f}s): {e}")
@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# analyze_item_deeply 的输出结构：字段 -> (类型, 输出预算 token 数)
+# summary 要求 50-80 个汉字，按一字一 token 留余量
+ANALYSIS_SCHEMA = {
+    "is_noise": (bool, 2),
+    "score": (int, 2),
+    "summary": (str, 120),
+    "tag": (str, 6),
+}
+ANALYSIS_TAGS = ["LLM", "Vision", "Agent", "Framework", "Hardware", "Audio"]
+
+# 显式设置时覆盖按 schema 算出来的上限
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "0"))
+LLM_MODEL = os.getenv("LLM_MODEL", "deepseek-chat")
+
+
+def schema_token_cap(schema: dict = ANALYSIS_SCHEMA) -> int:
+    """
+    按字段预算估出 max_tokens：每个字段的值 + 键名/引号/标点大约 6 个 token，再留 25% 余量。
+    原来固定 1024，模型跑偏 (比如开始长篇解释) 时会一直生成到 1024。
+    """
+    if LLM_MAX_TOKENS:
+        return LLM_MAX_TOKENS
+    body = sum(budget + 6 for _, budget in schema.values()) + 4
+    return int(body * 1.25)
+
+
+class ObjectScanner:
+    """
+    流式文本里找第一个完整的顶层 JSON 对象：跟踪括号深度和字符串/转义状态，
+    深度回到 0 的那一刻就能拿到完整对象，不用等模型把后面的内容 (换行、代码块结尾等) 吐完。
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str):
+        """
+        追加一段文本，对象完整时返回它的原文，否则返回 None
+        """
+        self.text += chunk
+        while self._pos < len(self.text):
+            ch = self.text[self._pos]
+            self._pos += 1
+            if self._start is None:
+                if ch == "{":
+                    self._start, self._depth = self._pos - 1, 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self.text[self._start:self._pos]
+        return None
+
+
+def validate(obj, schema: dict = ANALYSIS_SCHEMA) -> list:
+    """
+    返回问题列表 (空列表表示通过)。能无损纠正的顺手纠正：数字字符串转 int、"true"/"false" 转 bool。
+    """
+    if not isinstance(obj, dict):
+        return ["top-level value must be a JSON object"]
+    errors = []
+    for field, (kind, _) in schema.items():
+        if field not in obj:
+            errors.append(f"missing field '{field}'")
+            continue
+        value = obj[field]
+        if kind is bool and isinstance(value, str) and value.lower() in ("true", "false"):
+            obj[field] = value = value.lower() == "true"
+        if kind is int and isinstance(value, str) and value.strip().isdigit():
+            obj[field] = value = int(value.strip())
+        if kind is int and isinstance(value, float) and value.is_integer():
+            obj[field] = value = int(value)
+        # bool 是 int 的子类，单独排除
+        if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+            errors.append(f"field '{field}' must be {kind.__name__}, got {type(value).__name__}")
+    if "score" in obj and isinstance(obj["score"], int) and not 0 <= obj["score"] <= 10:
+        errors.append("field 'score' must be between 0 and 10")
+    return errors
+
+
+def _stream_object(client, messages: list, max_tokens: int):
+    """
+    JSON mode + 流式：解析出第一个完整对象就关掉连接。返回 (对象或 None, 原始文本)
+    """
+    stream = client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
+        temperature=0.1,
+        max_tokens=max_tokens,
+        response_format={"type": "json_object"},
+        stream=True,
+    )
+    scanner = ObjectScanner()
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            raw = scanner.feed(chunk.choices[0].delta.content or "")
+            if raw is None:
+                continue
+            try:
+                return json.loads(raw), scanner.text
+            except json.JSONDecodeError:
+                # 括号配平了但内容不合法 (比如尾逗号)，生成结束后交给修复
+                return None, scanner.text
+    finally:
+        stream.close()
+    return None, scanner.text
+
+
+def complete_json(client, prompt: str, schema: dict = ANALYSIS_SCHEMA) -> dict:
+    """
+    请求一个符合 schema 的 JSON 对象。输出不合法时做一次修复重试：
+    只把坏掉的输出和错误信息发回去 (不再带几千 token 的项目详情)，上限同样按 schema 算。
+    全部失败返回 None。
+    """
+    max_tokens = schema_token_cap(schema)
+    start = time.time()
+    obj, raw = _stream_object(
+        client,
+        [{"role": "system", "content": "You output JSON only."}, {"role": "user", "content": prompt}],
+        max_tokens,
+    )
+    errors = validate(obj, schema) if obj is not None else [f"not a complete JSON object (got {len(raw)} chars)"]
+    if not errors:
+        logger.debug(f"JSON object after {time.time() - start:.2f}s, {len(raw)} chars")
+        return obj
+
+    print(f"      🔧 Invalid JSON ({'; '.join(errors)}), repairing...")
+    fields = ", ".join(f'"{name}": <{kind.__name__}>' for name, (kind, _) in schema.items())
+    repair_prompt = (
+        f"The following output should be a JSON object {{{fields}}} but is invalid: {'; '.join(errors)}.\n"
+        f"Return the corrected JSON object only, keeping the original values where possible.\n\n{raw[:2000]}"
+    )
+    obj, raw = _stream_object(
+        client,
+        [{"role": "system", "content": "You output JSON only."}, {"role": "user", "content": repair_prompt}],
+        max_tokens,
+    )
+    if obj is not None and not validate(obj, schema):
+        return obj
+    logger.warning(f"LLM output still invalid after repair: {raw[:200]!r}")
+    return None
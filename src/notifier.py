@@ -1,68 +1,348 @@
 import os
-import requests
 import json
+import time
+import uuid
+import queue
+import threading
+import requests
 import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def send_to_feishu(content: str, webhook_url: str):
+# --- 投递参数 (均可通过 .env 覆盖) ---
+# 飞书卡片请求体上限约 30KB，留一点余量给 header/note。
+# 按实际发出去的 JSON 计 (ensure_ascii=False 的 UTF-8，加上换行/引号的转义)
+CARD_MAX_BYTES = int(os.getenv("NOTIFY_CARD_MAX_BYTES", "28000"))
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "3"))
+NOTIFY_BACKOFF = float(os.getenv("NOTIFY_BACKOFF", "2"))
+# 没送达的消息落盘到这里，下次运行时补发
+OUTBOX_DIR = os.getenv("NOTIFY_OUTBOX_DIR", ".sota_outbox")
+# 累计尝试这么多次还没送达 (或被明确拒绝) 的消息移到 outbox/dead/，不再重试
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "12"))
+DEAD_LETTER_DIR = os.path.join(OUTBOX_DIR, "dead")
+# 飞书返回这些 code 时值得重试 (频率限制)，其余非 0 code 都是请求本身有问题，重试也没用
+FEISHU_RETRYABLE_CODES = {11232}
+
+
+class PermanentError(RuntimeError):
     """
-    发送飞书卡片消息
+    重试也不会成功的失败 (4xx、飞书拒绝卡片内容)，直接进死信
     """
-    # 构造飞书卡片 JSON 结构
-    # 我们使用 'interactive' 类型，它支持 Markdown 渲染
-    payload = {
-        "msg_type": "interactive",
-        "card": {
-            "header": {
-                "title": {
-                    "tag": "plain_text",
-                    "content": f"🚨 SOTA Watch Daily ({datetime.date.today()})"
-                },
-                "template": "blue" # 标题颜色：blue, wathet, turquoise, green, yellow, orange, red, carmine, violet, purple, indigo, grey
-            },
-            "elements": [
-                {
-                    "tag": "markdown",
-                    "content": content
+
+
+def _json_bytes(payload) -> bytes:
+    # requests 的 json= 会把非 ASCII 全转成 \uXXXX，中文体积翻倍，自己序列化
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _payload_size(text: str) -> int:
+    return len(_json_bytes(text))
+
+
+def _fit(text: str, max_bytes: int) -> str:
+    """
+    text 最长的、序列化后不超过 max_bytes 的前缀 (按字符二分)
+    """
+    lo, hi = 1, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _payload_size(text[:mid]) <= max_bytes:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def chunk_report(content: str, max_bytes: int = CARD_MAX_BYTES) -> list:
+    """
+    按条目分隔符 (---) 把报告切成若干块，每块序列化成 JSON 字符串后不超过 max_bytes 字节。
+    单个条目本身超长时按行再切，保证任何一块都能塞进一张卡片。
+    """
+    if not content:
+        return []
+
+    blocks = [b + "---\n" for b in content.split("---\n")]
+    blocks[-1] = blocks[-1][:-len("---\n")]
+
+    chunks, current = [], ""
+    for block in blocks:
+        if _payload_size(current + block) <= max_bytes:
+            current += block
+            continue
+        if current:
+            chunks.append(current)
+            current = ""
+        # 单块仍然超长：逐行切
+        for line in block.splitlines(keepends=True):
+            while _payload_size(line) > max_bytes:
+                cut = _fit(line, max_bytes)
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(cut)
+                line = line[len(cut):]
+            if _payload_size(current + line) > max_bytes:
+                chunks.append(current)
+                current = ""
+            current += line
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+
+def _with_retry(fn, *args):
+    """
+    统一的 超时 + 重试 + 指数退避。fn 失败时抛异常，重试耗尽后把最后一次异常抛出去。
+    """
+    last_error = None
+    for attempt in range(NOTIFY_RETRIES):
+        try:
+            return fn(*args)
+        except PermanentError:
+            raise
+        except Exception as e:
+            last_error = e
+            if attempt < NOTIFY_RETRIES - 1:
+                time.sleep(NOTIFY_BACKOFF ** attempt)
+    raise last_error
+
+
+# ==========================================
+# Sinks: 每个 sink 只负责把一块内容发出去，失败就抛异常
+# ==========================================
+
+def _post_json(url: str, payload: dict):
+    response = requests.post(
+        url,
+        headers={"Content-Type": "application/json; charset=utf-8"},
+        data=_json_bytes(payload),
+        timeout=NOTIFY_TIMEOUT
+    )
+    # 4xx (限流除外) 是请求本身的问题
+    if 400 <= response.status_code < 500 and response.status_code != 429:
+        raise PermanentError(f"HTTP {response.status_code}: {response.text[:200]}")
+    response.raise_for_status()
+    return response
+
+
+class FeishuSink:
+    name = "feishu"
+
+    def __init__(self, webhook_url: str):
+        self.webhook_url = webhook_url
+
+    def send(self, content: str, index: int = 1, total: int = 1):
+        title = f"🚨 SOTA Watch Daily ({datetime.date.today()})"
+        if total > 1:
+            title += f" [{index}/{total}]"
+        # 构造飞书卡片 JSON 结构
+        # 我们使用 'interactive' 类型，它支持 Markdown 渲染
+        payload = {
+            "msg_type": "interactive",
+            "card": {
+                "header": {
+                    "title": {"tag": "plain_text", "content": title},
+                    "template": "blue" # 标题颜色：blue, wathet, turquoise, green, yellow, orange, red, carmine, violet, purple, indigo, grey
                 },
-                {
-                    "tag": "note",
-                    "elements": [
-                        {
-                            "tag": "plain_text",
-                            "content": f"Generated by AI Agent at {datetime.datetime.now().strftime('%H:%M')}"
-                        }
-                    ]
-                }
-            ]
+                "elements": [
+                    {"tag": "markdown", "content": content},
+                    {
+                        "tag": "note",
+                        "elements": [
+                            {
+                                "tag": "plain_text",
+                                "content": f"Generated by AI Agent at {datetime.datetime.now().strftime('%H:%M')}"
+                            }
+                        ]
+                    }
+                ]
+            }
         }
-    }
-
-    try:
-        response = requests.post(
-            webhook_url, 
-            headers={"Content-Type": "application/json"}, 
-            json=payload
-        )
-        
+        response = _post_json(self.webhook_url, payload)
         # 检查飞书的返回结果
         result = response.json()
-        if result.get("code") == 0:
-            print("✅ [Feishu] Notification sent successfully!")
-        else:
-            print(f"❌ [Feishu] Failed. Error: {result}")
-            
+        code = result.get("code")
+        if code != 0:
+            error = PermanentError if code not in FEISHU_RETRYABLE_CODES else RuntimeError
+            raise error(f"Feishu rejected message: {result}")
+
+
+class WebhookSink:
+    """
+    通用 JSON Webhook (Slack / 企业微信 / 自建服务)，POST {"text": ...}
+    """
+    name = "webhook"
+
+    def __init__(self, url: str):
+        self.url = url
+
+    def send(self, content: str, index: int = 1, total: int = 1):
+        _post_json(self.url, {"text": content, "part": index, "total": total})
+
+
+# 额外注册的 sink (register_sink)，与环境变量里配置的 sink 一起生效
+_extra_sinks = []
+
+def register_sink(sink):
+    """
+    注册自定义 sink。只要求有 name 属性和 send(content, index, total) 方法。
+    """
+    _extra_sinks.append(sink)
+
+
+def get_sinks() -> list:
+    sinks = []
+    feishu_url = os.getenv("FEISHU_WEBHOOK")
+    if feishu_url:
+        sinks.append(FeishuSink(feishu_url))
+    webhook_url = os.getenv("NOTIFY_WEBHOOK")
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    return sinks + _extra_sinks
+
+
+# ==========================================
+# Outbox: 先落盘，再投递，成功后删除
+# ==========================================
+
+def _outbox_put(message: dict) -> str:
+    os.makedirs(OUTBOX_DIR, exist_ok=True)
+    path = os.path.join(OUTBOX_DIR, f"{message['id']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(message, f, ensure_ascii=False)
+    return path
+
+
+def _dead_letter(path: str, message: dict):
+    os.makedirs(DEAD_LETTER_DIR, exist_ok=True)
+    with open(os.path.join(DEAD_LETTER_DIR, os.path.basename(path)), "w", encoding="utf-8") as f:
+        json.dump(message, f, ensure_ascii=False)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _outbox_pending() -> list:
+    if not os.path.isdir(OUTBOX_DIR):
+        return []
+    messages = []
+    for name in sorted(os.listdir(OUTBOX_DIR)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(OUTBOX_DIR, name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                messages.append((path, json.load(f)))
+        except Exception as e:
+            print(f"⚠️ [Outbox] Unreadable message {name}: {e}")
+    return messages
+
+
+# 后台投递线程：主流程只负责入队，不等待 webhook
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+# 已入队、还没处理完的 outbox 文件；flush_outbox 重复调用时不重复投递
+_in_flight = set()
+
+
+def _deliver(path: str, message: dict):
+    sinks = {s.name: s for s in get_sinks()}
+    sink = sinks.get(message["sink"])
+    if sink is None:
+        print(f"⚠️ [Notifier] Sink '{message['sink']}' not configured, keeping message in outbox.")
+        return
+    try:
+        _with_retry(sink.send, message["content"], message["index"], message["total"])
     except Exception as e:
-        print(f"❌ [Feishu] Connection error: {e}")
+        message["attempts"] = message.get("attempts", 0) + (1 if isinstance(e, PermanentError) else NOTIFY_RETRIES)
+        message["last_error"] = str(e)
+        if isinstance(e, PermanentError) or message["attempts"] >= NOTIFY_MAX_ATTEMPTS:
+            _dead_letter(path, message)
+            print(f"☠️ [{sink.name}] Giving up after {message['attempts']} attempt(s), moved to {DEAD_LETTER_DIR}: {e}")
+            return
+        _outbox_put(message)
+        print(f"❌ [{sink.name}] Delivery failed, kept in outbox for next run: {e}")
+        return
+    # 已经送达：文件删不掉 (已经被删) 也不能再写回 outbox，否则每次运行都会重发
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    print(f"✅ [{sink.name}] Part {message['index']}/{message['total']} delivered.")
+
+
+def _worker_loop():
+    while True:
+        path, message = _queue.get()
+        try:
+            _deliver(path, message)
+        finally:
+            with _worker_lock:
+                _in_flight.discard(path)
+            _queue.task_done()
+
+
+def _enqueue(path: str, message: dict) -> bool:
+    global _worker
+    with _worker_lock:
+        if path in _in_flight:
+            return False
+        _in_flight.add(path)
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_worker_loop, name="notifier", daemon=True)
+            _worker.start()
+    _queue.put((path, message))
+    return True
+
+
+def flush_outbox() -> int:
+    """
+    把没送达的消息重新放进投递队列 (正在投递的跳过)，返回补发条数。
+    """
+    with _worker_lock:
+        pending = [(path, message) for path, message in _outbox_pending() if path not in _in_flight]
+    if pending:
+        print(f"📬 [Outbox] Retrying {len(pending)} undelivered message(s)...")
+    return sum(_enqueue(path, message) for path, message in pending)
+
+
+def drain(timeout: float = 30) -> bool:
+    """
+    等后台投递结束 (最多 timeout 秒)。超时也没关系，消息都在 outbox 里，下次运行补发。
+    """
+    deadline = time.time() + timeout
+    while _queue.unfinished_tasks:
+        if time.time() >= deadline:
+            print(f"⏳ [Notifier] {_queue.unfinished_tasks} message(s) still in flight, left in outbox.")
+            return False
+        time.sleep(0.1)
+    return True
+
+
+def send_to_feishu(content: str, webhook_url: str) -> bool:
+    """
+    同步发送一张飞书卡片 (带超时和重试)，保留给脚本直接调用。
+    """
+    try:
+        _with_retry(FeishuSink(webhook_url).send, content, 1, 1)
+        print("✅ [Feishu] Notification sent successfully!")
+        return True
+    except Exception as e:
+        print(f"❌ [Feishu] Failed. Error: {e}")
+        return False
+
 
 def send_notification(content: str):
     """
-    主通知入口
+    主通知入口：本地备份 -> 切块 -> 写入 outbox -> 后台投递。
+    调用立即返回，webhook 的延迟不会拖慢 pipeline。
     """
     print("\n📨 [Notifier] Preparing notification...")
-    
+
     # 1. 总是保存一份到本地 (备份)
     today = datetime.date.today().strftime("%Y-%m-%d")
     filename = f"sota_report_{today}.md"
@@ -74,11 +354,25 @@ def send_notification(content: str):
     except Exception as e:
         print(f"❌ Failed to save local file: {e}")
 
-    # 2. 检查是否有飞书配置
-    feishu_url = os.getenv("FEISHU_WEBHOOK")
-    
-    if feishu_url:
-        print("🚀 Sending to Feishu...")
-        send_to_feishu(content, feishu_url)
-    else:
-        print("ℹ️  No FEISHU_WEBHOOK found in .env. Skipping cloud notification.")
\ No newline at end of file
+    # 2. 检查是否配置了任何 sink
+    sinks = get_sinks()
+    if not sinks:
+        print("ℹ️  No FEISHU_WEBHOOK / NOTIFY_WEBHOOK found in .env. Skipping cloud notification.")
+        return
+
+    chunks = chunk_report(content)
+    print(f"🚀 Queueing {len(chunks)} card(s) for {', '.join(s.name for s in sinks)}...")
+    # 同一份报告的各部分共用前缀、按序号排，outbox 补发时 (文件名排序) 顺序不乱
+    report_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    for sink in sinks:
+        for i, chunk in enumerate(chunks, 1):
+            message = {
+                "id": f"{report_id}-{sink.name}-{i:04d}",
+                "sink": sink.name,
+                "content": chunk,
+                "index": i,
+                "total": len(chunks),
+                "attempts": 0,
+                "created_at": datetime.datetime.now().isoformat()
+            }
+            _enqueue(_outbox_put(message), message)
@@ -0,0 +1,233 @@
+import os
+import json
+import time
+import random
+import logging
+import numpy as np
+from src.embedder import get_embedder, EMBEDDING_SLOTS
+
+logger = logging.getLogger(__name__)
+
+# off: 不启用；shadow: 只预测并统计与 LLM 的一致率，所有条目照常送 LLM；on: 低概率条目直接跳过 LLM
+PRESCORE_MODE = os.getenv("PRESCORE_MODE", "shadow")
+# 预测 "能进报告" 的概率低于这个值才跳过 LLM，其余 (不确定 + 高概率) 都送 LLM
+PRESCORE_SKIP_BELOW = float(os.getenv("PRESCORE_SKIP_BELOW", "0.15"))
+# on 模式下仍随机放行一小部分预测为低分的条目，持续给模型提供新标签，避免越训越偏
+PRESCORE_EXPLORE = float(os.getenv("PRESCORE_EXPLORE", "0.05"))
+# 至少这么多样本 (且正负样本都有) 才启用
+MIN_TRAINING_SAMPLES = 50
+# 分析日志新增这么多条就重新训练
+RETRAIN_EVERY = 25
+
+# 每次 LLM 分析的结果 (包括被拒的低分/噪音条目) 都记在这里，作为训练标签
+ANALYSIS_LOG = os.getenv("ANALYSIS_LOG_PATH", ".sota_data/analysis_log.jsonl")
+MODEL_PATH = os.getenv("PRESCORER_MODEL_PATH", ".sota_data/prescorer.npz")
+
+# 和 processor 的 [严选标准] 一致：非噪音且分数 >= 7 才进报告
+REPORT_MIN_SCORE = 7
+
+
+def candidate_text(item: dict) -> str:
+    """
+    预打分只能用抓取阶段就有的信息：标题 + 原始描述
+    """
+    return f"{item.get('title', '')} {item.get('description', '')}"
+
+
+def is_positive(score, is_noise) -> bool:
+    return not is_noise and (score or 0) >= REPORT_MIN_SCORE
+
+
+def log_outcome(item: dict, analysis: dict, embedding: list = None):
+    """
+    记下一条 LLM 分析结果。embedding 是预打分时算好的候选向量，顺手存下来，训练时不用重算。
+    """
+    os.makedirs(os.path.dirname(ANALYSIS_LOG) or ".", exist_ok=True)
+    record = {
+        "url": item.get("url"),
+        "title": item.get("title"),
+        "description": item.get("description"),
+        "score": analysis.get("score", 0),
+        "is_noise": bool(analysis.get("is_noise", False)),
+        "model": EMBEDDING_SLOTS["embedding"],
+        "embedding": embedding,
+        "at": time.time(),
+    }
+    with open(ANALYSIS_LOG, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _read_log() -> list:
+    if not os.path.exists(ANALYSIS_LOG):
+        return []
+    records = []
+    with open(ANALYSIS_LOG, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+class PreScorer:
+    """
+    候选向量上的逻辑回归 (numpy 实现，几千条样本训练只要几十毫秒)
+    """
+
+    def __init__(self, weights=None, bias: float = 0.0, trained_on: int = 0, model_spec: str = None):
+        self.weights = weights
+        self.bias = bias
+        self.trained_on = trained_on
+        self.model_spec = model_spec
+
+    @property
+    def ready(self) -> bool:
+        return self.weights is not None and len(self.weights) > 0 and self.model_spec == EMBEDDING_SLOTS["embedding"]
+
+    def fit(self, X: np.ndarray, y: np.ndarray, l2: float = 1e-2, lr: float = 0.5, epochs: int = 300):
+        # 正负样本数量悬殊 (大部分候选进不了报告)，按类别频率加权
+        pos = max(y.sum(), 1)
+        neg = max(len(y) - y.sum(), 1)
+        sample_weight = np.where(y == 1, len(y) / (2 * pos), len(y) / (2 * neg))
+
+        w = np.zeros(X.shape[1], dtype=np.float64)
+        b = 0.0
+        for _ in range(epochs):
+            p = 1 / (1 + np.exp(-(X @ w + b)))
+            g = (p - y) * sample_weight
+            w -= lr * (X.T @ g / len(y) + l2 * w)
+            b -= lr * g.mean()
+        self.weights, self.bias = w, b
+        return self
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-(X @ self.weights + self.bias)))
+
+    def save(self, path: str = MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 未训练时存空权重，只当作 "训练于 N 条日志" 的标记
+        weights = self.weights if self.weights is not None else np.zeros(0)
+        np.savez(path, weights=weights, bias=self.bias, trained_on=self.trained_on, model_spec=self.model_spec)
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> "PreScorer":
+        if not os.path.exists(path):
+            return cls()
+        data = np.load(path, allow_pickle=False)
+        weights = data["weights"] if data["weights"].size else None
+        return cls(weights, float(data["bias"]), int(data["trained_on"]), str(data["model_spec"]))
+
+
+def _normalize(X: np.ndarray) -> np.ndarray:
+    return X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+
+
+def training_data():
+    """
+    训练样本只用分析日志 (含被拒条目)：候选向量 + LLM 打分。
+    sota_items 里存的是 标题+摘要+标签 的向量、且全是高分项，和预打分时的 标题+描述 不是一种文本，
+    混进来模型学到的是 "摘要风格 = 正样本"，反而会误杀。
+    """
+    model_spec = EMBEDDING_SLOTS["embedding"]
+    dim = get_embedder(model_spec).dim
+    X, y = [], []
+    for r in _read_log():
+        if r.get("embedding") and r.get("model") == model_spec and len(r["embedding"]) == dim:
+            X.append(r["embedding"])
+            y.append(1.0 if is_positive(r["score"], r["is_noise"]) else 0.0)
+
+    if not X:
+        return np.zeros((0, dim)), np.zeros(0)
+    return _normalize(np.asarray(X, dtype=np.float64)), np.asarray(y)
+
+
+def train() -> PreScorer:
+    X, y = training_data()
+    scorer = PreScorer(model_spec=EMBEDDING_SLOTS["embedding"], trained_on=len(_read_log()))
+    if len(y) < MIN_TRAINING_SAMPLES or y.min() == y.max():
+        print(f"   🧮 [PreScorer] Not enough labelled data yet ({len(y)} samples), LLM sees everything.")
+        # 记下 "在 N 条日志时还训不了"，日志再涨 RETRAIN_EVERY 条之前不用每次都重读
+        scorer.save()
+        return scorer
+    scorer.fit(X, y)
+    acc = ((scorer.predict_proba(X) >= 0.5) == (y == 1)).mean()
+    print(f"   🧮 [PreScorer] Trained on {len(y)} samples ({int(y.sum())} positive), train acc {acc:.0%}.")
+    scorer.save()
+    return scorer
+
+
+def load_or_train() -> PreScorer:
+    scorer = PreScorer.load()
+    stale = scorer.model_spec != EMBEDDING_SLOTS["embedding"]
+    if stale or len(_read_log()) - scorer.trained_on >= RETRAIN_EVERY:
+        scorer = train()
+    return scorer
+
+
+def prescore(candidates: list) -> tuple:
+    """
+    返回 (送 LLM 的条目, 被跳过的条目)。每个条目会带上 _prescore (概率) 和 _embedding (候选向量)，
+    后者给 log_outcome 复用。shadow / 模型未就绪时全部送 LLM。
+    """
+    if PRESCORE_MODE == "off" or not candidates:
+        return candidates, []
+
+    embedder = get_embedder()
+    vectors = embedder.generate_embeddings([candidate_text(item) for item in candidates])
+    for item, vector in zip(candidates, vectors):
+        item["_embedding"] = vector
+
+    try:
+        scorer = load_or_train()
+    except Exception as e:
+        logger.warning(f"PreScorer unavailable: {e}")
+        return candidates, []
+    if not scorer.ready:
+        return candidates, []
+
+    probs = scorer.predict_proba(_normalize(np.asarray(vectors, dtype=np.float64)))
+    keep, skipped = [], []
+    for item, p in zip(candidates, probs):
+        item["_prescore"] = float(p)
+        confident_low = p < PRESCORE_SKIP_BELOW
+        if PRESCORE_MODE == "on" and confident_low and random.random() >= PRESCORE_EXPLORE:
+            skipped.append(item)
+        else:
+            keep.append(item)
+
+    if PRESCORE_MODE == "on":
+        print(f"   🧮 [PreScorer] Skipping LLM for {len(skipped)}/{len(candidates)} predicted low scorers (p < {PRESCORE_SKIP_BELOW}).")
+    return keep, skipped
+
+
+def shadow_report(analyzed: list):
+    """
+    对比预打分和 LLM 的结论：预测跳过的条目里有多少其实进了报告 (误杀)，省下了多少次调用
+    analyzed: [(item, analysis_or_None), ...]
+    """
+    rows = [(item["_prescore"], analysis) for item, analysis in analyzed if "_prescore" in item and analysis]
+    if not rows:
+        return None
+    predicted_skip = [a for p, a in rows if p < PRESCORE_SKIP_BELOW]
+    missed = [a for a in predicted_skip if is_positive(a.get("score", 0), a.get("is_noise", False))]
+    agree = sum(
+        (p >= PRESCORE_SKIP_BELOW) == is_positive(a.get("score", 0), a.get("is_noise", False))
+        for p, a in rows
+    )
+    stats = {
+        "evaluated": len(rows),
+        "agreement": agree / len(rows),
+        "would_skip": len(predicted_skip),
+        "missed_positives": len(missed),
+    }
+    print(
+        f"   🧮 [PreScorer/{PRESCORE_MODE}] agreement {stats['agreement']:.0%} on {stats['evaluated']} items | "
+        f"would skip {stats['would_skip']} LLM calls, {stats['missed_positives']} of them were report-worthy."
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    # 手动重新训练：python -m src.prescorer
+    train()
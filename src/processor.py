@@ -1,10 +1,15 @@
 import os
-import json
 import time
 from dotenv import load_dotenv
 from openai import OpenAI
 # [新增] 引入爬虫
 from src.crawler import scrape_content
+from src.profiling import stage, httpx_client
+from src.github_enrich import enrich_github_items
+from src.context_builder import build_context, estimate_tokens
+from src.llm_json import complete_json, ANALYSIS_TAGS
+from src.prescorer import prescore, log_outcome, shadow_report
+from src.archive import archive_outcomes
 
 load_dotenv()
 
@@ -14,7 +19,9 @@ client = None
 if API_KEY:
     client = OpenAI(
         api_key=API_KEY,
-        base_url="https://api.deepseek.com"
+        base_url="https://api.deepseek.com",
+        # SOTA_PROFILE=http 时记录每次 LLM 请求的耗时，关闭时为 None (SDK 默认 client)
+        http_client=httpx_client()
     )
 else:
     print("⚠️ Warning: DEEPSEEK_API_KEY not found")
@@ -22,11 +29,17 @@ else:
 def analyze_item_deeply(item):
     if not client: return None
 
-    # 1. [深度阅读] 爬取全文
-    full_content = scrape_content(item['url'])
+    # 1. [深度阅读] GitHub 项目优先用 GraphQL 批量拿到的 README + 元数据，其余走爬虫
+    full_content = item.get('context')
+    if not full_content:
+        with stage("crawl", memory=True):
+            full_content = scrape_content(item['url'])
     
     # 如果爬取失败，回退到使用原来的描述
-    context = full_content if full_content else item['description']
+    raw_context = full_content if full_content else item['description']
+    # 去掉徽章/目录/安装步骤，按和打分任务的相关度挑章节，装进 token 预算
+    context = build_context(item, raw_context)
+    print(f"      📐 Context: ~{estimate_tokens(raw_context)} -> ~{estimate_tokens(context)} tokens")
 
     # 2. [V4.0 终极 Prompt]
     prompt = f"""
@@ -37,7 +50,7 @@ def analyze_item_deeply(item):
     原始描述: {item['description']}
     
     【项目详情 (Markdown)】:
-    {context[:4000]} ...
+    {context}
     
     【任务】:
     1. **判定噪音**:
@@ -52,7 +65,7 @@ def analyze_item_deeply(item):
 
     3. **深度总结**: 用中文，基于【项目详情】写 50-80 字的硬核技术摘要。
     
-    4. **标签**: (LLM, Vision, Agent, Framework, Hardware, Audio)。
+    4. **标签**: ({', '.join(ANALYSIS_TAGS)})。
 
     输出纯 JSON:
     {{
@@ -64,19 +77,8 @@ def analyze_item_deeply(item):
     """
     
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You output JSON only."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1,
-            max_tokens=1024
-        )
-        content = response.choices[0].message.content.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1].rsplit("\n", 1)[0]
-        return json.loads(content)
+        # JSON mode + 流式，拿到完整对象立刻断开；max_tokens 按输出字段估算，不合法时做一次廉价修复
+        return complete_json(client, prompt)
 
     except Exception as e:
         print(f"   ❌ Analysis Error: {e}")
@@ -98,16 +100,37 @@ def process_data(raw_items: list) -> str:
     print(f"\n🧠 [Processor] Deep analyzing {len(candidates)} items (Filtered from {len(raw_items)})...")
     
     if not candidates: return "No qualified data."
+
+    # 2. [本地预打分] 用历史 LLM 结论训练的小模型，把稳定低分的条目挡在 LLM 之外
+    try:
+        candidates, skipped = prescore(candidates)
+        for item in skipped:
+            print(f"   🧮 [PreScorer] Skipped (p={item['_prescore']:.2f}): {item['title']}")
+    except Exception as e:
+        print(f"   ⚠️ PreScorer failed, sending everything to LLM: {e}")
+
+    # 3. [批量预读] GitHub 仓库一次性批量拉 README，省掉逐个走 Jina 的慢请求
+    try:
+        enrich_github_items(candidates)
+    except Exception as e:
+        print(f"   ⚠️ GitHub enrichment failed, falling back to crawler: {e}")
     
     sota_items = []
+    analyzed = []
     
     # 全量跑
     for i, item in enumerate(candidates):
         print(f"   ({i+1}/{len(candidates)}) Deep Reading: {item['title']} ...")
         
         analysis = analyze_item_deeply(item)
+        analyzed.append((item, analysis))
         
         if analysis:
+            # 被拒的条目也记下来，作为预打分模型的训练标签
+            try:
+                log_outcome(item, analysis, item.get('_embedding'))
+            except Exception as e:
+                print(f"      ⚠️ Failed to log outcome: {e}")
             score = analysis.get('score', 0)
             is_noise = analysis.get('is_noise', False)
             print(f"      -> Score: {score} | Noise: {is_noise}")
@@ -117,10 +140,21 @@ def process_data(raw_items: list) -> str:
                 item.update(analysis)
                 sota_items.append(item)
         else:
+            # 没拿到结论：main 会立刻归还租约，下一次运行重新分析
+            item['_analysis_failed'] = True
             print("      -> Skipped (Error)")
         
-        # 爬虫需要礼貌，间隔 1.5 秒
-        time.sleep(1.5)
+        # 爬虫需要礼貌，间隔 1.5 秒 (走 GraphQL 预读的不经过爬虫，不用等)
+        if not item.get('context'):
+            time.sleep(1.5)
+
+    shadow_report(analyzed)
+
+    # 所有分析过的条目 (含被拒的) 连同向量归档成列式文件，离线分析/训练直接 mmap 读取
+    try:
+        archive_outcomes(analyzed)
+    except Exception as e:
+        print(f"   ⚠️ Archive failed: {e}")
 
     if not sota_items:
         return "🔕 No SOTA updates found (Strict filtering)."
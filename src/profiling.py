@@ -0,0 +1,214 @@
+"""
+可选的性能剖析钩子，由环境变量 SOTA_PROFILE 控制 (不设置时所有钩子都是空操作)。
+
+    SOTA_PROFILE=1                       全部开启
+    SOTA_PROFILE=cprofile,http           只开部分: cprofile / memory / http
+
+输出到 SOTA_PROFILE_DIR (默认 profiles/<时间戳>/)：
+    <stage>.prof     cProfile 结果，snakeviz / `python -m pstats` 打开
+    memory.txt       tracemalloc 每个阶段的峰值和分配最多的代码行
+    http.csv         每个 HTTP 请求 (requests / LLM 的 httpx) 和 Supabase 调用的 host / 状态码 / 耗时
+    trace.json       阶段 + HTTP 请求的时间线，chrome://tracing 或 ui.perfetto.dev 打开
+"""
+import os
+import csv
+import json
+import time
+import atexit
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+from urllib.parse import urlparse
+
+_FLAGS = {f.strip() for f in os.getenv("SOTA_PROFILE", "").lower().split(",") if f.strip()}
+if _FLAGS & {"1", "true", "all", "on"}:
+    _FLAGS = {"cprofile", "memory", "http"}
+ENABLED = bool(_FLAGS)
+
+PROFILE_DIR = os.path.join(os.getenv("SOTA_PROFILE_DIR", "profiles"), time.strftime("%Y%m%d-%H%M%S"))
+
+_NOOP = contextlib.nullcontext()
+_lock = threading.Lock()
+_t0 = time.perf_counter()
+_profiles = {}      # stage -> cProfile.Profile (同名阶段多次进入会累加)
+_memory = {}        # stage -> {"peak": bytes, "top": [str]}
+_events = []        # chrome trace events
+_http_calls = []
+_profiling = False   # cProfile (3.12+ 基于 sys.monitoring) 是进程级的，同一时刻只能开一个
+
+
+def _us() -> float:
+    return (time.perf_counter() - _t0) * 1e6
+
+
+@contextlib.contextmanager
+def _stage(name: str, memory: bool):
+    start = _us()
+    global _profiling
+    # 嵌套阶段 / 其它线程里并发的阶段只计时，由先进入的那个负责 profile
+    profile = None
+    if "cprofile" in _FLAGS:
+        with _lock:
+            if not _profiling:
+                profile = _profiles.setdefault(name, cProfile.Profile())
+                _profiling = True
+        if profile:
+            profile.enable()
+
+    track_memory = memory and "memory" in _FLAGS
+    # 谁开的 tracemalloc 谁关，不然之后所有代码 (包括常驻的 dashboard) 都背着追踪开销
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if track_memory:
+        if started_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+    try:
+        yield
+    finally:
+        if profile:
+            profile.disable()
+            with _lock:
+                _profiling = False
+        if track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            top = [str(s) for s in tracemalloc.take_snapshot().statistics("lineno")[:15]]
+            if started_tracing:
+                tracemalloc.stop()
+            with _lock:
+                previous = _memory.get(name, {"peak": 0})
+                if peak >= previous["peak"]:
+                    _memory[name] = {"peak": peak, "top": top}
+        with _lock:
+            _events.append({"name": name, "cat": "stage", "ph": "X", "ts": start, "dur": _us() - start,
+                            "pid": os.getpid(), "tid": threading.get_ident()})
+
+
+def stage(name: str, memory: bool = False):
+    """
+    with stage("fetch"): ...
+    memory=True 时额外用 tracemalloc 记录该阶段的分配峰值 (开销较大，只用在 embedding / 爬虫这类阶段)
+    关闭时返回同一个 nullcontext，没有任何额外开销。
+    """
+    if not ENABLED:
+        return _NOOP
+    return _stage(name, memory)
+
+
+def _record_call(method: str, url: str, status, elapsed: float):
+    host = urlparse(url).netloc
+    end = _us()
+    with _lock:
+        _http_calls.append({
+            "method": method,
+            "host": host,
+            "path": urlparse(url).path,
+            "status": status,
+            "elapsed_ms": round(elapsed * 1000, 1),
+        })
+        _events.append({"name": f"{method} {host}", "cat": "http", "ph": "X", "ts": end - elapsed * 1e6,
+                        "dur": elapsed * 1e6, "pid": os.getpid(), "tid": threading.get_ident(),
+                        "args": {"status": status, "url": url}})
+
+
+def _record_http(response, *args, **kwargs):
+    request = response.request
+    _record_call(request.method, request.url, response.status_code, response.elapsed.total_seconds())
+    return response
+
+
+def instrument_session(session):
+    """
+    给 requests.Session 挂上响应钩子，记录每个请求的 host / 状态码 / 耗时 (到响应头为止)
+    """
+    if "http" in _FLAGS:
+        session.hooks["response"].append(_record_http)
+    return session
+
+
+def _httpx_request(request):
+    request.extensions["sota_profile_start"] = time.perf_counter()
+
+
+def _httpx_response(response):
+    request = response.request
+    start = request.extensions.get("sota_profile_start")
+    if start is not None:
+        _record_call(request.method, str(request.url), response.status_code, time.perf_counter() - start)
+
+
+def httpx_client():
+    """
+    OpenAI SDK (DeepSeek) 用的 httpx.Client，挂上请求/响应钩子，计时口径和 instrument_session 一致。
+    关闭时返回 None，SDK 用它自己的默认 client。
+    """
+    if "http" not in _FLAGS:
+        return None
+    import httpx
+    return httpx.Client(event_hooks={"request": [_httpx_request], "response": [_httpx_response]})
+
+
+def instrument_store(store):
+    """
+    Supabase SDK 内部的 httpx client 拿不到，改为给存储后端的每个公开方法计时，
+    记在 http.csv / trace.json 里 (method 列是存储方法名，host 是后端名)
+    """
+    if "http" not in _FLAGS:
+        return store
+    for attr in dir(store):
+        method = getattr(store, attr)
+        if attr.startswith("_") or not callable(method):
+            continue
+        setattr(store, attr, _timed_call(store.name, attr, method))
+    return store
+
+
+def _timed_call(backend: str, attr: str, method):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            _record_call(attr, f"{backend}://{backend}/{attr}", status, time.perf_counter() - start)
+    return wrapper
+
+
+def flush():
+    """
+    把目前收集到的数据写到 PROFILE_DIR (覆盖写，可以反复调用，比如 dashboard 每次 rerun 结束时)
+    """
+    if not ENABLED:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with _lock:
+        profiles = dict(_profiles)
+        memory = dict(_memory)
+        events = list(_events)
+        calls = list(_http_calls)
+
+    for name, profile in profiles.items():
+        profile.dump_stats(os.path.join(PROFILE_DIR, f"{name}.prof"))
+
+    if memory:
+        with open(os.path.join(PROFILE_DIR, "memory.txt"), "w", encoding="utf-8") as f:
+            for name, info in memory.items():
+                f.write(f"== {name}: peak {info['peak'] / 1024 / 1024:.1f} MB ==\n")
+                f.write("\n".join(info["top"]) + "\n\n")
+
+    if calls:
+        with open(os.path.join(PROFILE_DIR, "http.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(calls[0]))
+            writer.writeheader()
+            writer.writerows(calls)
+
+    with open(os.path.join(PROFILE_DIR, "trace.json"), "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+if ENABLED:
+    atexit.register(flush)
+    print(f"🔬 Profiling enabled ({', '.join(sorted(_FLAGS))}) -> {PROFILE_DIR}")
@@ -0,0 +1,210 @@
+import os
+import re
+import math
+import pickle
+import logging
+import datetime
+from collections import defaultdict
+from src.stores import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", ".sota_index/bm25.pkl")
+# 增量同步按 (updated_at, id) 走，往回多拉这么多秒：并发 writer / 多个分片乱序提交的行不会被跳过
+INDEX_SYNC_OVERLAP = float(os.getenv("INDEX_SYNC_OVERLAP", "300"))
+INDEX_COLUMNS = "id,title,url,summary,score,tags,source,created_at,updated_at"
+
+# BM25 参数 (经典取值)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 标题命中比摘要更能说明问题，标题词重复计入
+TITLE_WEIGHT = 2
+
+# 标识符整体保留 (qwen2.5-vl、deepseek-ai/deepseek-v3)，同时再拆成子词
+_IDENT_RE = re.compile(r"[a-z0-9]+(?:[._\-/][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z]+|[0-9]+")
+_CJK_RE = re.compile(r"[一-鿿]+")
+
+
+def tokenize(text: str) -> list:
+    """
+    英文/标识符：整体 + 子词；中文：单字 + 相邻二字。
+    """
+    if not text:
+        return []
+    text = text.lower()
+    tokens = []
+    for ident in _IDENT_RE.findall(text):
+        tokens.append(ident)
+        parts = _PART_RE.findall(ident)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    for run in _CJK_RE.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    判断查询是不是 "找某个东西" 而不是 "找某类概念"：
+    带版本号/连字符/斜杠的标识符，或者只有一个英文词，就不需要语义向量。
+    """
+    words = query.split()
+    if any(re.search(r"[0-9]|[._\-/]", w) for w in words):
+        return True
+    if any(re.search(r"[a-z][A-Z]", w) for w in words):
+        return True
+    return len(words) == 1 and not _CJK_RE.search(query)
+
+
+class BM25Index:
+    """
+    本地倒排索引，支持增量 add。文档行本身也存一份，关键词命中可以直接渲染，不用再查库。
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)   # term -> {doc_id: tf}
+        self.doc_len = {}                   # doc_id -> 词数
+        self.docs = {}                      # doc_id -> 原始行
+        self.total_len = 0
+        self.sync_mark = None               # 增量同步水位线 (已索引行的最大 updated_at)
+        self.last_sync = 0.0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def copy(self) -> "BM25Index":
+        """
+        增量更新用的副本：在副本上 add，再整体替换引用，正在 search 的线程不会看到改到一半的字典。
+        行本身只会被整体替换、不会原地修改，所以 docs 浅拷贝即可。
+        """
+        clone = BM25Index()
+        clone.postings = defaultdict(dict, {term: dict(posting) for term, posting in self.postings.items()})
+        clone.doc_len = dict(self.doc_len)
+        clone.docs = dict(self.docs)
+        clone.total_len = self.total_len
+        clone.sync_mark = self.sync_mark
+        clone.last_sync = self.last_sync
+        return clone
+
+    @staticmethod
+    def _tokens(row: dict) -> list:
+        tokens = tokenize(row.get("title")) * TITLE_WEIGHT
+        return tokens + tokenize(row.get("summary")) + tokenize(row.get("tags"))
+
+    def add(self, row: dict):
+        doc_id = row["id"]
+        if doc_id in self.docs:
+            self.remove(doc_id)
+
+        tokens = self._tokens(row)
+        tf = defaultdict(int)
+        for t in tokens:
+            tf[t] += 1
+        for t, n in tf.items():
+            self.postings[t][doc_id] = n
+
+        self.doc_len[doc_id] = len(tokens)
+        self.total_len += len(tokens)
+        self.docs[doc_id] = {k: v for k, v in row.items() if k != "embedding"}
+        if row.get("updated_at") and row["updated_at"] > (self.sync_mark or ""):
+            self.sync_mark = row["updated_at"]
+
+    def remove(self, doc_id):
+        if doc_id not in self.docs:
+            return
+        for term in set(self._tokens(self.docs[doc_id])):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(doc_id)
+        del self.docs[doc_id]
+
+    def search(self, query: str, k: int = 20, accept=None) -> list:
+        """
+        返回 [(doc_id, bm25_score), ...]，按分数降序。
+        accept(row) 给定时先过滤再取 top k (标签/来源筛选不会把结果截没)。
+        """
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+        avgdl = self.total_len / n_docs
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (BM25_K1 + 1) / norm
+
+        if accept is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if accept(self.docs[doc_id])}
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def save(self, path: str = INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> "BM25Index":
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    index = pickle.load(f)
+                # 老版本按 id 水位线同步的索引没有 updated_at，重建一次
+                if hasattr(index, "sync_mark"):
+                    return index
+            except Exception as e:
+                logger.warning(f"Search index unreadable, rebuilding: {e}")
+        return cls()
+
+
+def new_rows(index: BM25Index, store, batch_size: int = 1000, overlap: float = INDEX_SYNC_OVERLAP) -> list:
+    """
+    从存储后端拉取水位线 (减去 overlap) 之后新增或改过的行 (不修改索引)。
+    按 id 水位线会漏掉乱序提交的行，和 ReplicaStore.sync 一样按 (updated_at, id) 翻页。
+    """
+    mark = index.sync_mark
+    since = (parse_timestamp(mark) - datetime.timedelta(seconds=overlap)).isoformat() if mark else None
+    rows, cursor = [], None
+    while True:
+        batch = store.rows_changed_since(since, cursor, batch_size, INDEX_COLUMNS)
+        # 重叠窗口里已经索引过且没变的行跳过
+        rows.extend(
+            row for row in batch
+            if row["id"] not in index.docs or index.docs[row["id"]].get("updated_at") != row.get("updated_at")
+        )
+        if len(batch) < batch_size:
+            return rows
+        cursor = (batch[-1]["updated_at"], batch[-1]["id"])
+
+
+def sync_index(index: BM25Index, store, batch_size: int = 1000) -> int:
+    """
+    把新增或改过的行原地加入索引，返回条数。索引被多个线程同时 search 时用 copy() + new_rows() 换引用。
+    """
+    rows = new_rows(index, store, batch_size)
+    for row in rows:
+        index.add(row)
+    return len(rows)
+
+
+def rrf_fuse(rankings: list, k: int = 60) -> list:
+    """
+    Reciprocal Rank Fusion：score = Σ 1 / (k + rank)。
+    rankings 是若干个按相关性排好序的 doc_id 列表，返回融合后的 [(doc_id, score), ...]。
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, 1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
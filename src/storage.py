@@ -1,56 +1,73 @@
-import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
 # [新增] 引入向量生成器
-from src.embedder import get_embedding
+from src.embedder import embed_for_slots
+from src.profiling import stage
+from src.stores import create_store
+from src.knn_graph import update_graph
+from src.aggregates import update_aggregates
 
 load_dotenv()
-url = os.getenv("SUPABASE_URL")
-key = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key) if url and key else None
+
+# 存储后端由 STORAGE_BACKEND 决定 (supabase / local / replica)，见 src/stores.py
+store = create_store()
 
 def filter_new_items(raw_items: list) -> list:
-    # ... (这部分代码保持不变，不需要改) ...
-    if not raw_items or not supabase: return raw_items
+    if not raw_items: return raw_items
     current_urls = [item['url'] for item in raw_items]
     try:
-        response = supabase.table("sota_items").select("url").in_("url", current_urls).execute()
-        existing_urls = {row['url'] for row in response.data}
+        existing_urls = store.existing_urls(current_urls)
         return [item for item in raw_items if item['url'] not in existing_urls]
     except Exception:
         return raw_items
 
 def save_items(processed_items: list):
     """
-    [V3.0 升级版] 存储同时也存入向量
+    [V3.0 升级版] 存储同时也存入向量，返回写入后的行 (带 id)
     """
-    if not processed_items or not supabase: return
+    if not processed_items: return []
 
-    print(f"💾 [Storage] Saving {len(processed_items)} items with Embeddings...")
+    print(f"💾 [Storage] Saving {len(processed_items)} items with Embeddings ({store.name})...")
     
     data_to_insert = []
-    for item in processed_items:
-        # 1. 准备要向量化的文本 (标题 + 摘要 + 标签)
-        # 这样用户搜标签或搜内容都能搜到
-        text_to_embed = f"{item.get('title')} {item.get('summary')} {item.get('tags')}"
-        
-        # 2. 生成向量
-        vector = get_embedding(text_to_embed)
-        
-        data_to_insert.append({
-            "title": item.get('title'),
-            "url": item.get('url'),
-            "summary": item.get('summary'),
-            "score": item.get('score', 0),
-            "tags": item.get('tag'),
-            "source": item.get('source'),
-            "publish_date": item.get('publish_date'),
-            "embedding": vector  # [新增] 存入向量列
-        })
+    # 整批算一次 stage (memory=True 每次都要做 tracemalloc 快照，逐条包会把计时本身拖慢)
+    with stage("embed", memory=True):
+        for item in processed_items:
+            # 1. 准备要向量化的文本 (标题 + 摘要 + 标签)
+            # 这样用户搜标签或搜内容都能搜到
+            text_to_embed = f"{item.get('title')} {item.get('summary')} {item.get('tags')}"
+
+            # 2. 生成向量 (每个已配置的槽位一份，并记录模型版本)
+            vectors = embed_for_slots(text_to_embed)
+
+            data_to_insert.append({
+                "title": item.get('title'),
+                "url": item.get('url'),
+                "summary": item.get('summary'),
+                "score": item.get('score', 0),
+                "tags": item.get('tag'),
+                "source": item.get('source'),
+                "publish_date": item.get('publish_date'),
+                **vectors  # [新增] 存入向量列 embedding / embedding_model (+ embedding_next*)
+            })
     
     try:
-        supabase.table("sota_items").insert(data_to_insert).execute()
+        inserted = store.insert(data_to_insert)
         print("✅ Data saved successfully.")
     except Exception as e:
         print(f"❌ Database Insert Error: {e}")
-        
\ No newline at end of file
+        return []
+
+    # 3. 增量更新 kNN 图：只算新条目的邻居，并把反向边并入老条目
+    vectors_by_url = {row["url"]: row for row in data_to_insert}
+    saved = [{**vectors_by_url.get(row["url"], {}), **row} for row in inserted]
+    try:
+        update_graph(store, saved)
+    except Exception as e:
+        print(f"⚠️ Neighbor graph update failed: {e}")
+
+    # 4. 增量更新聚合表 (按天/标签/来源计数、分数直方图、各标签 top N)，dashboard 的筛选和趋势图只读它
+    try:
+        update_aggregates(store, saved)
+    except Exception as e:
+        print(f"⚠️ Aggregate update failed (rebuild with `python -m src.aggregates`): {e}")
+    return saved
@@ -0,0 +1,718 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import datetime
+import threading
+import logging
+import numpy as np
+from src.profiling import instrument_store
+
+logger = logging.getLogger(__name__)
+
+# sota_items 的业务字段 (不含 id / created_at / embedding)
+ITEM_FIELDS = ["title", "url", "summary", "score", "tags", "source", "publish_date"]
+# 向量槽位 (见 src/embedder.py)，每个槽位旁边有一列 <slot>_model 记录生成它的模型
+EMBEDDING_SLOTS = ["embedding", "embedding_next"]
+# 列表/搜索结果默认返回的列，不带 embedding，省带宽
+LIST_COLUMNS = "id,title,url,summary,score,tags,source,publish_date,created_at"
+# 重新生成向量时需要的列
+EMBED_SOURCE_COLUMNS = "id,title,summary,tags,source"
+# 聚合表 (src/aggregates.py) 的列
+STATS_COLUMNS = "day,tag,source,score,items"
+TOP_COLUMNS = "tag,item_id,score,created_at,title,url"
+# 和 sota_items.created_at 默认值同一格式
+_SQLITE_NOW = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+# 每个槽位对应的 Supabase 检索 RPC
+MATCH_RPC = {"embedding": "match_sota_items", "embedding_next": "match_sota_items_next"}
+
+
+def _parse_vector(value):
+    """
+    pgvector 经 PostgREST 返回的是字符串 "[0.1,0.2,...]"，本地存的是 float32 blob，统一成 list。
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    if isinstance(value, (bytes, memoryview)):
+        return np.frombuffer(value, dtype=np.float32).tolist()
+    return list(value)
+
+
+_TIMESTAMP = re.compile(r"^(.+?\d{2}:\d{2}:\d{2})(?:\.(\d+))?(Z|[+-]\d{2}(?::?\d{2})?)?$")
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+    """
+    Postgres / PostgREST 的 timestamptz 字符串 -> datetime。
+    Postgres 会去掉小数末尾的 0 (".12345")，Python 3.10 的 fromisoformat 只认 3 位或 6 位小数，
+    时区也可能是 "+00" / "Z"，先规整再解析。
+    """
+    match = _TIMESTAMP.match(value.strip())
+    if not match:
+        raise ValueError(f"Unrecognized timestamp: {value!r}")
+    base, fraction, tz = match.groups()
+    fraction = (fraction or "").ljust(6, "0")[:6]
+    if not tz or tz == "Z":
+        tz = "+00:00"
+    elif len(tz) == 3:
+        tz += ":00"
+    elif ":" not in tz:
+        tz = f"{tz[:3]}:{tz[3:]}"
+    return datetime.datetime.fromisoformat(f"{base}.{fraction}{tz}")
+
+
+def _group_edges(rows: list) -> dict:
+    graph = {}
+    for r in rows:
+        graph.setdefault(r["item_id"], []).append((r["neighbor_id"], r["similarity"]))
+    for edges in graph.values():
+        edges.sort(key=lambda e: e[1], reverse=True)
+    return graph
+
+
+def _top_per_tag(rows: list, limit: int) -> list:
+    # rows 已按 score、created_at 降序
+    seen = {}
+    result = []
+    for r in rows:
+        if seen.get(r["tag"], 0) < limit:
+            seen[r["tag"]] = seen.get(r["tag"], 0) + 1
+            result.append(r)
+    return result
+
+
+# ==========================================
+# Supabase (远端，权威数据源)
+# ==========================================
+
+class SupabaseStore:
+    name = "supabase"
+
+    def __init__(self, client):
+        self.client = client
+
+    def _table(self):
+        return self.client.table("sota_items")
+
+    def existing_urls(self, urls: list) -> set:
+        if not urls:
+            return set()
+        response = self._table().select("url").in_("url", urls).execute()
+        return {row['url'] for row in response.data}
+
+    def insert(self, rows: list) -> list:
+        response = self._table().insert(rows).execute()
+        return response.data or []
+
+    def list_items(self, min_score: int = 0, limit: int = 50, tags: list = None, sources: list = None) -> list:
+        query = self._table().select("*").gte("score", min_score)
+        if tags:
+            query = query.in_("tags", tags)
+        if sources:
+            query = query.in_("source", sources)
+        response = query.order("created_at", desc=True).limit(limit).execute()
+        return response.data or []
+
+    def match_items(self, query_embedding: list, match_threshold: float = 0.25, match_count: int = 20, slot: str = "embedding") -> list:
+        response = self.client.rpc(
+            MATCH_RPC[slot],
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": match_threshold,
+                "match_count": match_count
+            }
+        ).execute()
+        return response.data or []
+
+    def rows_after(self, after_id: int, limit: int = 1000, columns: str = "*") -> list:
+        response = self._table() \
+            .select(columns) \
+            .gt("id", after_id) \
+            .order("id") \
+            .limit(limit) \
+            .execute()
+        return response.data or []
+
+    def rows_by_ids(self, ids: list, columns: str = "*") -> list:
+        if not ids:
+            return []
+        response = self._table().select(columns).in_("id", ids).execute()
+        return response.data or []
+
+    def rows_changed_since(self, since: str = None, cursor: tuple = None, limit: int = 1000, columns: str = "*") -> list:
+        """
+        updated_at >= since 的行，按 (updated_at, id) 排序；cursor 是上一页最后一行的 (updated_at, id)
+        """
+        query = self._table().select(columns)
+        if since:
+            query = query.gte("updated_at", since)
+        if cursor:
+            ts, item_id = cursor
+            query = query.or_(f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt.{item_id})')
+        response = query.order("updated_at").order("id").limit(limit).execute()
+        return response.data or []
+
+    def rows_needing_embedding(self, slot: str, model_spec: str, limit: int = 100) -> list:
+        """
+        该槽位为空，或者不是由 model_spec 生成的行
+        """
+        response = self._table() \
+            .select(EMBED_SOURCE_COLUMNS) \
+            .or_(f'{slot}.is.null,{slot}_model.is.null,{slot}_model.neq."{model_spec}"') \
+            .order("id") \
+            .limit(limit) \
+            .execute()
+        return response.data or []
+
+    def update_embedding(self, item_id, vector: list, slot: str = "embedding", model_spec: str = None):
+        self._table().update({slot: vector, f"{slot}_model": model_spec}).eq("id", item_id).execute()
+
+    def neighbors(self, item_ids: list) -> dict:
+        """
+        预计算的 kNN 边：{item_id: [(neighbor_id, similarity), ...]}，按相似度降序
+        """
+        if not item_ids:
+            return {}
+        response = self.client.table("sota_item_neighbors") \
+            .select("item_id,neighbor_id,similarity") \
+            .in_("item_id", item_ids) \
+            .execute()
+        return _group_edges(response.data or [])
+
+    def replace_neighbors(self, item_id, edges: list):
+        table = self.client.table("sota_item_neighbors")
+        table.delete().eq("item_id", item_id).execute()
+        if edges:
+            table.insert([
+                {"item_id": item_id, "neighbor_id": n, "similarity": sim} for n, sim in edges
+            ]).execute()
+
+    def claim_urls(self, urls: list, worker: str, ttl: float) -> set:
+        """
+        抢占 URL 租约 (src/leases.py)：没人持有、已过期或本来就是自己的才能拿到，返回实际拿到的 URL。
+        抢占要在一条语句里原子完成，走 claim_sota_item_leases RPC。
+        """
+        if not urls:
+            return set()
+        response = self.client.rpc(
+            "claim_sota_item_leases",
+            {"urls": urls, "worker": worker, "ttl_seconds": int(ttl)}
+        ).execute()
+        return {row["url"] if isinstance(row, dict) else row for row in response.data or []}
+
+    def release_urls(self, urls: list, worker: str):
+        if urls:
+            self.client.table("sota_item_leases").delete().eq("worker", worker).in_("url", urls).execute()
+
+    def record_stats(self, items: list, top_n: int):
+        """
+        写入时增量更新聚合表。计数要在库里原子累加 (并发运行)，走 record_sota_item_stats RPC。
+        items: 刚写入的行 (id, tags, source, score, created_at, title, url)
+        """
+        if items:
+            self.client.rpc("record_sota_item_stats", {"new_items": items, "top_n": top_n}).execute()
+
+    def clear_stats(self):
+        self.client.table("sota_item_stats").delete().gte("score", -1).execute()
+        self.client.table("sota_top_items").delete().gte("item_id", 0).execute()
+
+    def item_stats(self, since: str = None) -> list:
+        query = self.client.table("sota_item_stats").select(STATS_COLUMNS)
+        if since:
+            query = query.gte("day", since)
+        return query.order("day").execute().data or []
+
+    def top_items(self, tags: list = None, limit: int = 5) -> list:
+        query = self.client.table("sota_top_items").select(TOP_COLUMNS)
+        if tags:
+            query = query.in_("tag", tags)
+        rows = query.order("score", desc=True).order("created_at", desc=True).execute().data or []
+        return _top_per_tag(rows, limit)
+
+
+# ==========================================
+# SQLite (本地嵌入式，可单独使用，也可作为只读副本)
+# ==========================================
+
+class SQLiteStore:
+    name = "local"
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # Streamlit 多线程共享同一连接，用锁串行化
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # 向量检索用的内存矩阵 {(slot, dim): (ids, vectors)}，写入后失效重建
+        self._matrix = {}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sota_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT,
+                    url TEXT UNIQUE,
+                    summary TEXT,
+                    score INTEGER DEFAULT 0,
+                    tags TEXT,
+                    source TEXT,
+                    publish_date TEXT,
+                    created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+                    embedding BLOB,
+                    embedding_model TEXT,
+                    embedding_next BLOB,
+                    embedding_next_model TEXT,
+                    updated_at TEXT
+                )
+            """)
+            # 老版本本地库没有版本列，补上
+            existing = {r["name"] for r in self._conn.execute("PRAGMA table_info(sota_items)")}
+            for slot in EMBEDDING_SLOTS:
+                for column, kind in [(slot, "BLOB"), (f"{slot}_model", "TEXT")]:
+                    if column not in existing:
+                        self._conn.execute(f"ALTER TABLE sota_items ADD COLUMN {column} {kind}")
+            # 增量同步水位线：副本里是远端的 updated_at 原样存下来，本地模式由 insert / update_embedding 维护
+            if "updated_at" not in existing:
+                self._conn.execute("ALTER TABLE sota_items ADD COLUMN updated_at TEXT")
+            self._conn.execute("UPDATE sota_items SET updated_at = created_at WHERE updated_at IS NULL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sota_items_updated ON sota_items (updated_at, id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sota_items_score_created ON sota_items (score, created_at)")
+            # kNN 图 (src/knn_graph.py)：每个条目存 K 条出边
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sota_item_neighbors (
+                    item_id INTEGER NOT NULL,
+                    neighbor_id INTEGER NOT NULL,
+                    similarity REAL NOT NULL,
+                    PRIMARY KEY (item_id, neighbor_id)
+                )
+            """)
+            # URL 租约 (src/leases.py)：同一条目同一时间只由一个 worker 分析
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sota_item_leases (
+                    url TEXT PRIMARY KEY,
+                    worker TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            # 写入时增量维护的聚合 (src/aggregates.py)：按 天 × 标签 × 来源 × 分数 计数，
+            # 按天/标签/来源的数量和分数直方图都从这张表汇总，体积只和天数 × 标签数有关
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sota_item_stats (
+                    day TEXT NOT NULL,
+                    tag TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    items INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, tag, source, score)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sota_top_items (
+                    tag TEXT NOT NULL,
+                    item_id INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    created_at TEXT,
+                    title TEXT,
+                    url TEXT,
+                    PRIMARY KEY (tag, item_id)
+                )
+            """)
+
+    def _rows(self, sql: str, params=()) -> list:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = []
+            for r in cursor.fetchall():
+                row = dict(r)
+                for slot in EMBEDDING_SLOTS:
+                    if slot in row:
+                        row[slot] = _parse_vector(row[slot])
+                rows.append(row)
+            return rows
+
+    @staticmethod
+    def _blob(vector):
+        if vector is None:
+            return None
+        return np.asarray(_parse_vector(vector), dtype=np.float32).tobytes()
+
+    def existing_urls(self, urls: list) -> set:
+        if not urls:
+            return set()
+        placeholders = ",".join("?" * len(urls))
+        return {r["url"] for r in self._rows(f"SELECT url FROM sota_items WHERE url IN ({placeholders})", urls)}
+
+    def insert(self, rows: list) -> list:
+        """
+        和 Supabase 一样：url 重复时整批失败。
+        """
+        columns = ITEM_FIELDS + [f"{slot}_model" for slot in EMBEDDING_SLOTS] + EMBEDDING_SLOTS
+        with self._lock, self._conn:
+            ids = []
+            for row in rows:
+                cursor = self._conn.execute(
+                    f"INSERT INTO sota_items ({','.join(columns)}, updated_at) VALUES ({','.join('?' * len(columns))}, {_SQLITE_NOW})",
+                    [row.get(c) for c in columns[:-len(EMBEDDING_SLOTS)]] + [self._blob(row.get(slot)) for slot in EMBEDDING_SLOTS]
+                )
+                ids.append(cursor.lastrowid)
+            self._matrix = {}
+        placeholders = ",".join("?" * len(ids))
+        return self._rows(f"SELECT {LIST_COLUMNS} FROM sota_items WHERE id IN ({placeholders})", ids) if ids else []
+
+    def upsert(self, rows: list):
+        """
+        按远端 id 原样写入 (副本同步用)。
+        """
+        columns = ["id"] + ITEM_FIELDS + ["created_at", "updated_at"] + [f"{slot}_model" for slot in EMBEDDING_SLOTS] + EMBEDDING_SLOTS
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO sota_items ({','.join(columns)}) VALUES ({','.join('?' * len(columns))})",
+                [
+                    [row.get(c) for c in columns[:-len(EMBEDDING_SLOTS)]] + [self._blob(row.get(slot)) for slot in EMBEDDING_SLOTS]
+                    for row in rows
+                ]
+            )
+            self._matrix = {}
+
+    def list_items(self, min_score: int = 0, limit: int = 50, tags: list = None, sources: list = None) -> list:
+        where, params = ["score >= ?"], [min_score]
+        for column, values in (("tags", tags), ("source", sources)):
+            if values:
+                where.append(f"{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        return self._rows(
+            f"SELECT {LIST_COLUMNS} FROM sota_items WHERE {' AND '.join(where)} ORDER BY created_at DESC LIMIT ?",
+            (*params, limit)
+        )
+
+    def _load_matrix(self, slot: str, dim: int):
+        with self._lock:
+            key = (slot, dim)
+            if key not in self._matrix:
+                # 迁移过程中同一槽位可能混着不同维度的向量，只取和查询维度一致的
+                rows = self._conn.execute(
+                    f"SELECT id, {slot} AS vec FROM sota_items WHERE length({slot}) = ?", (dim * 4,)
+                ).fetchall()
+                ids = np.array([r["id"] for r in rows], dtype=np.int64)
+                vectors = np.array([np.frombuffer(r["vec"], dtype=np.float32) for r in rows], dtype=np.float32).reshape(len(rows), dim)
+                if len(vectors):
+                    # 预先归一化，检索时一次矩阵乘法就是余弦相似度
+                    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+                self._matrix[key] = (ids, vectors)
+            return self._matrix[key]
+
+    def match_items(self, query_embedding: list, match_threshold: float = 0.25, match_count: int = 20, slot: str = "embedding") -> list:
+        """
+        与 Supabase 的 match_sota_items RPC 语义一致：余弦相似度 > 阈值，按相似度降序。
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        ids, vectors = self._load_matrix(slot, len(query))
+        if not len(ids):
+            return []
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        similarities = vectors @ query
+        top = np.argsort(-similarities)[:match_count]
+        top = [i for i in top if similarities[i] > match_threshold]
+        if not top:
+            return []
+
+        hit_ids = [int(ids[i]) for i in top]
+        placeholders = ",".join("?" * len(hit_ids))
+        rows = {r["id"]: r for r in self._rows(f"SELECT {LIST_COLUMNS} FROM sota_items WHERE id IN ({placeholders})", hit_ids)}
+        results = []
+        for i, item_id in zip(top, hit_ids):
+            row = rows[item_id]
+            row["similarity"] = float(similarities[i])
+            results.append(row)
+        return results
+
+    def rows_after(self, after_id: int, limit: int = 1000, columns: str = "*") -> list:
+        return self._rows(f"SELECT {columns} FROM sota_items WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit))
+
+    def rows_by_ids(self, ids: list, columns: str = "*") -> list:
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        return self._rows(f"SELECT {columns} FROM sota_items WHERE id IN ({placeholders})", ids)
+
+    def rows_changed_since(self, since: str = None, cursor: tuple = None, limit: int = 1000, columns: str = "*") -> list:
+        where, params = [], []
+        if since:
+            where.append("updated_at >= ?")
+            params.append(since)
+        if cursor:
+            where.append("(updated_at > ? OR (updated_at = ? AND id > ?))")
+            params += [cursor[0], cursor[0], cursor[1]]
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        return self._rows(f"SELECT {columns} FROM sota_items {clause} ORDER BY updated_at, id LIMIT ?", [*params, limit])
+
+    def rows_needing_embedding(self, slot: str, model_spec: str, limit: int = 100) -> list:
+        return self._rows(
+            f"SELECT {EMBED_SOURCE_COLUMNS} FROM sota_items "
+            f"WHERE {slot} IS NULL OR {slot}_model IS NULL OR {slot}_model != ? ORDER BY id LIMIT ?",
+            (model_spec, limit)
+        )
+
+    def update_embedding(self, item_id, vector: list, slot: str = "embedding", model_spec: str = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE sota_items SET {slot} = ?, {slot}_model = ?, updated_at = {_SQLITE_NOW} WHERE id = ?",
+                (self._blob(vector), model_spec, item_id)
+            )
+            self._matrix = {}
+
+    def neighbors(self, item_ids: list) -> dict:
+        if not item_ids:
+            return {}
+        placeholders = ",".join("?" * len(item_ids))
+        return _group_edges(self._rows(
+            f"SELECT item_id, neighbor_id, similarity FROM sota_item_neighbors WHERE item_id IN ({placeholders})", item_ids
+        ))
+
+    def replace_neighbors(self, item_id, edges: list):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sota_item_neighbors WHERE item_id = ?", (item_id,))
+            self._conn.executemany(
+                "INSERT INTO sota_item_neighbors (item_id, neighbor_id, similarity) VALUES (?, ?, ?)",
+                [(item_id, n, sim) for n, sim in edges]
+            )
+
+    def claim_urls(self, urls: list, worker: str, ttl: float) -> set:
+        if not urls:
+            return set()
+        now = time.time()
+        placeholders = ",".join("?" * len(urls))
+        with self._lock, self._conn:
+            # 多个进程共享同一个库文件时靠 SQLite 的写锁保证原子性
+            self._conn.execute("BEGIN IMMEDIATE")
+            # 过期的租约 (被拒条目的、挂掉的 worker 的) 没人会再来覆盖，抢之前清掉
+            self._conn.execute("DELETE FROM sota_item_leases WHERE expires_at < ?", (now,))
+            self._conn.executemany(
+                """
+                INSERT INTO sota_item_leases (url, worker, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET worker = excluded.worker, expires_at = excluded.expires_at
+                WHERE sota_item_leases.expires_at < ? OR sota_item_leases.worker = excluded.worker
+                """,
+                [(url, worker, now + ttl, now) for url in urls]
+            )
+            rows = self._conn.execute(
+                f"SELECT url FROM sota_item_leases WHERE worker = ? AND url IN ({placeholders})", [worker, *urls]
+            ).fetchall()
+        return {r["url"] for r in rows}
+
+    def release_urls(self, urls: list, worker: str):
+        if not urls:
+            return
+        placeholders = ",".join("?" * len(urls))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"DELETE FROM sota_item_leases WHERE worker = ? AND url IN ({placeholders})", [worker, *urls]
+            )
+
+    def record_stats(self, items: list, top_n: int):
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO sota_item_stats (day, tag, source, score, items) VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(day, tag, source, score) DO UPDATE SET items = items + 1
+                """,
+                [(str(r.get("created_at") or "")[:10], r.get("tags") or "", r.get("source") or "", r.get("score") or 0) for r in items]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO sota_top_items (tag, item_id, score, created_at, title, url) VALUES (?, ?, ?, ?, ?, ?)",
+                [(r.get("tags") or "", r["id"], r.get("score") or 0, r.get("created_at"), r.get("title"), r.get("url")) for r in items]
+            )
+            for tag in {r.get("tags") or "" for r in items}:
+                self._conn.execute(
+                    """
+                    DELETE FROM sota_top_items WHERE tag = ? AND item_id NOT IN (
+                        SELECT item_id FROM sota_top_items WHERE tag = ? ORDER BY score DESC, created_at DESC LIMIT ?
+                    )
+                    """,
+                    (tag, tag, top_n)
+                )
+
+    def clear_stats(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sota_item_stats")
+            self._conn.execute("DELETE FROM sota_top_items")
+
+    def item_stats(self, since: str = None) -> list:
+        if since:
+            return self._rows(f"SELECT {STATS_COLUMNS} FROM sota_item_stats WHERE day >= ? ORDER BY day", (since,))
+        return self._rows(f"SELECT {STATS_COLUMNS} FROM sota_item_stats ORDER BY day")
+
+    def top_items(self, tags: list = None, limit: int = 5) -> list:
+        where, params = "", []
+        if tags:
+            where, params = f"WHERE tag IN ({','.join('?' * len(tags))})", list(tags)
+        rows = self._rows(f"SELECT {TOP_COLUMNS} FROM sota_top_items {where} ORDER BY score DESC, created_at DESC", params)
+        return _top_per_tag(rows, limit)
+
+    def max_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM sota_items").fetchone()[0]
+
+    def max_updated_at(self) -> str:
+        with self._lock:
+            return self._conn.execute("SELECT MAX(updated_at) FROM sota_items").fetchone()[0]
+
+
+# ==========================================
+# Replica: 读走本地副本，写走远端再回写副本
+# ==========================================
+
+class ReplicaStore:
+    name = "replica"
+
+    def __init__(self, remote: SupabaseStore, local: SQLiteStore, sync_interval: float = 60, overlap: float = 300):
+        self.remote = remote
+        self.local = local
+        self.sync_interval = sync_interval
+        # updated_at 取的是事务开始时间，晚提交的事务可能带着比水位线更早的时间戳，往回多拉一段
+        self.overlap = overlap
+        self._last_sync = 0.0
+        self._sync_lock = threading.Lock()
+
+    def _since(self):
+        mark = self.local.max_updated_at()
+        if not mark:
+            return None
+        since = parse_timestamp(mark) - datetime.timedelta(seconds=self.overlap)
+        return since.isoformat()
+
+    def sync(self, batch_size: int = 1000) -> int:
+        """
+        增量同步：拉 updated_at 在 (本地水位线 - overlap) 之后的所有行，已有的 id 覆盖写。
+        新插入、乱序提交的行和老行上的更新 (backfill / 换模型后的向量) 都能拉到。
+        """
+        since, cursor, synced = self._since(), None, 0
+        while True:
+            rows = self.remote.rows_changed_since(since, cursor, batch_size)
+            if rows:
+                self.local.upsert(rows)
+                cursor = (rows[-1]["updated_at"], rows[-1]["id"])
+            synced += len(rows)
+            if len(rows) < batch_size:
+                break
+
+        self._last_sync = time.time()
+        if synced:
+            logger.info(f"Replica synced {synced} changed rows from Supabase.")
+        return synced
+
+    def _maybe_sync(self):
+        if time.time() - self._last_sync < self.sync_interval:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self.sync()
+        except Exception as e:
+            # 远端不可用时继续用本地副本
+            logger.warning(f"Replica sync failed, serving local data: {e}")
+        finally:
+            self._sync_lock.release()
+
+    def existing_urls(self, urls: list) -> set:
+        self._maybe_sync()
+        return self.local.existing_urls(urls)
+
+    def insert(self, rows: list) -> list:
+        # 不直接回写副本 (水位线只由 sync 推进)，让下一次读先同步，保证读到自己刚写的行
+        inserted = self.remote.insert(rows)
+        self._last_sync = 0.0
+        return inserted
+
+    def list_items(self, min_score: int = 0, limit: int = 50, tags: list = None, sources: list = None) -> list:
+        self._maybe_sync()
+        return self.local.list_items(min_score, limit, tags, sources)
+
+    def match_items(self, query_embedding: list, match_threshold: float = 0.25, match_count: int = 20, slot: str = "embedding") -> list:
+        self._maybe_sync()
+        return self.local.match_items(query_embedding, match_threshold, match_count, slot)
+
+    def rows_after(self, after_id: int, limit: int = 1000, columns: str = "*") -> list:
+        self._maybe_sync()
+        return self.local.rows_after(after_id, limit, columns)
+
+    def rows_by_ids(self, ids: list, columns: str = "*") -> list:
+        self._maybe_sync()
+        return self.local.rows_by_ids(ids, columns)
+
+    def rows_changed_since(self, since: str = None, cursor: tuple = None, limit: int = 1000, columns: str = "*") -> list:
+        self._maybe_sync()
+        return self.local.rows_changed_since(since, cursor, limit, columns)
+
+    def rows_needing_embedding(self, slot: str, model_spec: str, limit: int = 100) -> list:
+        return self.remote.rows_needing_embedding(slot, model_spec, limit)
+
+    def update_embedding(self, item_id, vector: list, slot: str = "embedding", model_spec: str = None):
+        # 远端触发器会刷新 updated_at，下次 sync 拉回来
+        self.remote.update_embedding(item_id, vector, slot, model_spec)
+
+    # 邻居表的出边会随新条目不断改写，按 id 水位线同步不了，直接读远端 (一次批量查询)
+    def neighbors(self, item_ids: list) -> dict:
+        return self.remote.neighbors(item_ids)
+
+    def replace_neighbors(self, item_id, edges: list):
+        self.remote.replace_neighbors(item_id, edges)
+
+    # 租约必须在所有 worker 共享的远端上抢，本地副本看不到别的机器
+    def claim_urls(self, urls: list, worker: str, ttl: float) -> set:
+        return self.remote.claim_urls(urls, worker, ttl)
+
+    def release_urls(self, urls: list, worker: str):
+        self.remote.release_urls(urls, worker)
+
+    # 聚合表很小 (天数 × 标签数)，直接读写远端，dashboard 侧有缓存
+    def record_stats(self, items: list, top_n: int):
+        self.remote.record_stats(items, top_n)
+
+    def clear_stats(self):
+        self.remote.clear_stats()
+
+    def item_stats(self, since: str = None) -> list:
+        return self.remote.item_stats(since)
+
+    def top_items(self, tags: list = None, limit: int = 5) -> list:
+        return self.remote.top_items(tags, limit)
+
+
+def create_store(backend: str = None, default: str = "supabase"):
+    """
+    STORAGE_BACKEND:
+      - supabase: 所有读写直连 Supabase
+      - local:    只用本地 SQLite (离线开发/测试)
+      - replica:  写 Supabase，读本地增量副本 (适合常驻进程，比如 dashboard)
+    不指定时用 default；没有 Supabase 凭证则退回 local，而不是直接禁用存储。
+    """
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    backend = backend or os.getenv("STORAGE_BACKEND") or (default if url and key else "local")
+    local_path = os.getenv("LOCAL_DB_PATH", ".sota_data/sota_items.db")
+
+    if backend == "local":
+        return SQLiteStore(local_path)
+
+    if not url or not key:
+        raise RuntimeError(f"STORAGE_BACKEND={backend} requires SUPABASE_URL and SUPABASE_KEY")
+    from supabase import create_client
+    # SOTA_PROFILE=http 时给每个远端调用计时 (Supabase SDK 的 httpx client 不对外暴露)
+    remote = instrument_store(SupabaseStore(create_client(url, key)))
+    if backend == "supabase":
+        return remote
+    if backend == "replica":
+        return ReplicaStore(
+            remote,
+            SQLiteStore(local_path),
+            float(os.getenv("REPLICA_SYNC_INTERVAL", "60")),
+            float(os.getenv("REPLICA_SYNC_OVERLAP", "300")),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")